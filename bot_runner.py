@@ -6,13 +6,10 @@ Checks bot_stats.is_running() to know when to stop.
 """
 
 import sys
-import time
 import os
 
 from config.settings import load_settings, validate_settings
 from scraper.crawler import CisiaCrawler
-from notifications.telegram_bot import TelegramNotifier
-from notifications.email_sender import EmailNotifier
 from utils.logger import Logger
 from utils.i18n import I18n
 from utils.scheduler import IntervalScheduler
@@ -41,52 +38,43 @@ def run():
         random_lo=settings["random_interval_from"],
         random_hi=settings["random_interval_to"],
     )
+    fixed_wait = settings["check_interval_minutes"] * 60 if settings["check_mode"] == "fixed" else None
+    tg = settings["telegram"]
+    em = settings["email"]
 
     # Telegram
     telegram = None
-    if settings["telegram"]["enabled"]:
-        from notifications.telegram_bot import EXAM_GROUP_IDS
-        import notifications.telegram_bot as _tg_mod
-        for k, v in settings.get("exam_group_ids", {}).items():
-            if v:
-                EXAM_GROUP_IDS[k] = v
-        _tg_mod.PREMIUM_GROUP_ID = settings.get("premium_group_id", "")
+    if tg["enabled"]:
+        from notifications.telegram_bot import TelegramNotifier, configure_group_ids
+        configure_group_ids(settings.get("exam_group_ids", {}), settings.get("premium_group_id", ""))
 
         telegram = TelegramNotifier(
-            bot_token=settings["telegram"]["bot_token"],
-            chat_id=settings["telegram"]["chat_id"],
+            bot_token=tg["bot_token"],
+            chat_id=tg["chat_id"],
             lang=lang, logger=logger,
-            message_count=settings["telegram"]["message_count"],
-            multi_user=settings["telegram"]["multi_user"],
-            github_token=settings["telegram"].get("github_token", ""),
+            message_count=tg["message_count"],
+            multi_user=tg["multi_user"],
+            github_token=tg.get("github_token", ""),
         )
-        if settings["telegram"]["multi_user"]:
+        if tg["multi_user"]:
             telegram.start_polling()
 
     # Email
     email_notifier = None
-    if settings["email"]["enabled"]:
+    if em["enabled"]:
+        from notifications.email_sender import EmailNotifier
         email_notifier = EmailNotifier(
-            smtp_host=settings["email"]["smtp_host"],
-            smtp_port=settings["email"]["smtp_port"],
-            smtp_user=settings["email"]["smtp_user"],
-            smtp_password=settings["email"]["smtp_password"],
-            from_email=settings["email"]["from_email"],
-            to_email=settings["email"]["to_email"],
-            use_tls=settings["email"]["use_tls"],
+            smtp_host=em["smtp_host"],
+            smtp_port=em["smtp_port"],
+            smtp_user=em["smtp_user"],
+            smtp_password=em["smtp_password"],
+            from_email=em["from_email"],
+            to_email=em["to_email"],
+            use_tls=em["use_tls"],
             lang=lang, logger=logger,
         )
 
-    # Startup delay
-    delay = settings.get("startup_delay_seconds", 300)
-    if delay > 0:
-        logger.info("Startup delay: {}s".format(delay))
-        for _ in range(delay):
-            if not bot_stats.is_running():
-                return
-            time.sleep(1)
-
-    crawler_exam_type = "ALL" if settings["telegram"].get("multi_user") else settings["exam_type"]
+    crawler_exam_type = "ALL" if tg.get("multi_user") else settings["exam_type"]
     crawler = CisiaCrawler(
         exam_type=crawler_exam_type,
         format_type=settings["format_type"],
@@ -94,25 +82,36 @@ def run():
         logger=logger, lang=lang,
     )
 
+    t_check_num = lang.t_template("check_number")
+    t_no_seats = lang.t("no_seats")
+    t_seats_found = lang.t_template("seats_found")
+
     check_count = 0
     try:
+        # Startup delay
+        delay = settings.get("startup_delay_seconds", 300)
+        if delay > 0:
+            logger.info("Startup delay: {}s".format(delay))
+            if bot_stats.wait_for_stop(delay):
+                return
+
         while bot_stats.is_running():
             check_count += 1
-            logger.info(lang.t("check_number", n=check_count))
+            logger.info(t_check_num.format(n=check_count))
             try:
                 results = crawler.check_availability()
-                total = sum(len(s) for s in results.values())
+                total = sum(map(len, results.values()))
                 bot_stats.record_crawl(seats_found=total, exams_checked=len(results))
 
                 if total > 0:
-                    logger.success(lang.t("seats_found", count=total))
+                    logger.success(t_seats_found.format(count=total))
                     if telegram:
                         telegram.send_availability_alert(results)
                         telegram.send_daily_no_spots(results)
                     if email_notifier:
                         email_notifier.send_availability_alert(results)
                 else:
-                    logger.info(lang.t("no_seats"))
+                    logger.info(t_no_seats)
                     if telegram:
                         telegram.send_daily_no_spots(results)
 
@@ -120,13 +119,16 @@ def run():
                 logger.error(lang.t("error_check", error=str(e)))
                 bot_stats.record_error(str(e))
 
-            wait = scheduler.next_seconds()
-            for _ in range(int(wait)):
-                if not bot_stats.is_running():
-                    break
-                time.sleep(1)
+            wait = fixed_wait if fixed_wait is not None else scheduler.next_seconds()
+            if bot_stats.wait_for_stop(int(wait)):
+                break
     finally:
         bot_stats.set_running(False)
+        crawler.close()
+        if telegram:
+            telegram.shutdown()
+        if email_notifier:
+            email_notifier.close()
 
 
 if __name__ == "__main__":
@@ -4,10 +4,17 @@ Reads settings from config.yaml and provides defaults.
 Supports saving settings back to config.yaml from the interactive menu.
 """
 
+import copy
+import json
 import os
 import sys
 import yaml
 
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.yaml")
 
 EXAM_TYPES = {
@@ -26,6 +33,13 @@ EXAM_TYPES = {
 
 FORMAT_TYPES = ["@HOME", "@UNI"]
 
+# Precomputed lookups used by validate_settings() and get_all_exam_keys()
+_EXAM_KEYS_SORTED = tuple(sorted(EXAM_TYPES))
+_EXAM_KEYS_STR = ", ".join(_EXAM_KEYS_SORTED)
+_VALID_LANGS = frozenset(("en", "it"))
+_VALID_MODES = frozenset(("fixed", "random"))
+_VALID_FORMATS = frozenset(FORMAT_TYPES)
+
 DEFAULT_CONFIG = {
     "exam_type": "CEnT-S",
     "format_type": "@HOME",
@@ -70,47 +84,97 @@ DEFAULT_CONFIG = {
     "startup_delay_seconds": 300,
 }
 
+# Parsed settings keyed by (mtime_ns, size) of config.yaml
+_CACHE = {"mtime": None, "data": None}
 
-def load_settings():
-    """Load settings from config.yaml, falling back to defaults."""
-    if not os.path.exists(CONFIG_FILE):
-        save_settings(DEFAULT_CONFIG)
-        return {**DEFAULT_CONFIG, "telegram": {**DEFAULT_CONFIG["telegram"]}, "email": {**DEFAULT_CONFIG["email"]}}
+# JSON copy of the parsed config.yaml, reused while config.yaml is unchanged
+CACHE_FILE = CONFIG_FILE + ".cache.json"
 
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        user_config = yaml.safe_load(f) or {}
 
+def _merge_defaults(user_config):
+    """Overlay a user config dict on top of DEFAULT_CONFIG."""
     settings = {}
     for key, default in DEFAULT_CONFIG.items():
         if isinstance(default, dict):
-            settings[key] = {**default, **user_config.get(key, {})}
+            settings[key] = default | user_config.get(key, {})
         else:
             settings[key] = user_config.get(key, default)
+    return settings
+
+
+def _read_sidecar(stamp):
+    """Return the parsed config.yaml from the JSON sidecar if it matches `stamp`."""
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("yaml_stamp") != list(stamp):
+        return None
+    user_config = cached.get("data")
+    return user_config if isinstance(user_config, dict) else None
+
+
+def _write_sidecar(user_config):
+    """Store the parsed config.yaml as JSON, stamped with its (mtime_ns, size)."""
+    try:
+        st = os.stat(CONFIG_FILE)
+        fd = os.open(CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump({"yaml_stamp": [st.st_mtime_ns, st.st_size], "data": user_config}, f, ensure_ascii=False)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def load_settings():
+    """Load settings from config.yaml, falling back to defaults."""
+    if not os.path.exists(CONFIG_FILE):
+        save_settings(DEFAULT_CONFIG)
+        return {**DEFAULT_CONFIG, "telegram": {**DEFAULT_CONFIG["telegram"]}, "email": {**DEFAULT_CONFIG["email"]}}
 
+    st = os.stat(CONFIG_FILE)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _CACHE["mtime"] == stamp:
+        return copy.deepcopy(_CACHE["data"])
+
+    user_config = _read_sidecar(stamp)
+    if user_config is None:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            user_config = yaml.load(f, Loader=_Loader) or {}
+        _write_sidecar(user_config)
+    settings = _merge_defaults(user_config)
+
+    _CACHE["mtime"] = stamp
+    _CACHE["data"] = copy.deepcopy(settings)
     return settings
 
 
 def save_settings(settings):
     """Write settings dict back to config.yaml preserving comments structure."""
+    _CACHE["mtime"] = None
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        yaml.dump(settings, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        yaml.dump(settings, f, Dumper=_Dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    _write_sidecar(settings)
 
 
 def validate_settings(settings):
-    """Validate settings. Returns (ok, error_message)."""
-    exam = settings["exam_type"]
-    if exam != "ALL" and exam not in EXAM_TYPES:
-        return False, "Invalid exam_type: {}. Available: ALL, {}".format(exam, ", ".join(EXAM_TYPES.keys()))
+    """Validate settings. Returns (ok, error_message).
 
-    if settings["format_type"] not in FORMAT_TYPES:
-        return False, "Invalid format_type: {}".format(settings["format_type"])
-
-    if settings["language"] not in ["en", "it"]:
+    Checks run cheapest first so invalid configs are rejected early.
+    """
+    if settings["language"] not in _VALID_LANGS:
         return False, "Invalid language. Use 'en' or 'it'."
 
-    if settings["check_mode"] not in ["fixed", "random"]:
+    if settings["check_mode"] not in _VALID_MODES:
         return False, "Invalid check_mode. Use 'fixed' or 'random'."
 
+    if settings["format_type"] not in _VALID_FORMATS:
+        return False, "Invalid format_type: {}".format(settings["format_type"])
+
+    exam = settings["exam_type"]
+    if exam != "ALL" and exam not in EXAM_TYPES:
+        return False, "Invalid exam_type: {}. Available: ALL, {}".format(exam, _EXAM_KEYS_STR)
+
     if settings["check_mode"] == "random":
         lo = settings["random_interval_from"]
         hi = settings["random_interval_to"]
@@ -128,7 +192,7 @@ def validate_settings(settings):
 
 def get_all_exam_keys():
     """Return a sorted list of all exam type keys."""
-    return sorted(EXAM_TYPES.keys())
+    return list(_EXAM_KEYS_SORTED)
 
 
 def print_banner():
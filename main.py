@@ -8,14 +8,11 @@ A web scraper to monitor CISIA test seat availability
 and notify via Telegram and Email.
 """
 
-import time
 import signal
 import sys
 
 from config.settings import load_settings, validate_settings, print_banner, save_settings
 from scraper.crawler import CisiaCrawler
-from notifications.telegram_bot import TelegramNotifier
-from notifications.email_sender import EmailNotifier
 from utils.logger import Logger
 from utils.i18n import I18n
 from utils.scheduler import IntervalScheduler
@@ -28,6 +25,8 @@ from utils.menu import (
 # Global stats instance shared with web panel
 bot_stats = BotStats()
 
+_SEP = "-" * 60
+
 
 def signal_handler(sig, frame):
     bot_stats.set_running(False)
@@ -74,66 +73,60 @@ def run_bot(settings):
         random_lo=settings["random_interval_from"],
         random_hi=settings["random_interval_to"],
     )
+    fixed_wait = settings["check_interval_minutes"] * 60 if settings["check_mode"] == "fixed" else None
+    tg = settings["telegram"]
+    em = settings["email"]
 
     # Telegram
     telegram = None
-    if settings["telegram"]["enabled"]:
-        from notifications.telegram_bot import EXAM_GROUP_IDS, PREMIUM_GROUP_ID as _PG
-        import notifications.telegram_bot as _tg_mod
-        for exam_key, group_id in settings.get("exam_group_ids", {}).items():
-            if group_id:
-                EXAM_GROUP_IDS[exam_key] = group_id
-        _tg_mod.PREMIUM_GROUP_ID = settings.get("premium_group_id", "")
+    if tg["enabled"]:
+        from notifications.telegram_bot import TelegramNotifier, configure_group_ids
+        configure_group_ids(settings.get("exam_group_ids", {}), settings.get("premium_group_id", ""))
 
         telegram = TelegramNotifier(
-            bot_token=settings["telegram"]["bot_token"],
-            chat_id=settings["telegram"]["chat_id"],
+            bot_token=tg["bot_token"],
+            chat_id=tg["chat_id"],
             lang=lang,
             logger=logger,
-            message_count=settings["telegram"]["message_count"],
-            multi_user=settings["telegram"]["multi_user"],
-            github_token=settings["telegram"].get("github_token", ""),
+            message_count=tg["message_count"],
+            multi_user=tg["multi_user"],
+            github_token=tg.get("github_token", ""),
         )
         logger.info(lang.t("telegram_enabled"))
-        logger.info(lang.t("msg_count", count=settings["telegram"]["message_count"]))
-        if settings["telegram"]["multi_user"]:
+        logger.info(lang.t("msg_count", count=tg["message_count"]))
+        if tg["multi_user"]:
             telegram.start_polling()
     else:
         logger.warn(lang.t("telegram_disabled"))
 
     # Email
     email_notifier = None
-    if settings["email"]["enabled"]:
+    if em["enabled"]:
+        from notifications.email_sender import EmailNotifier
         email_notifier = EmailNotifier(
-            smtp_host=settings["email"]["smtp_host"],
-            smtp_port=settings["email"]["smtp_port"],
-            smtp_user=settings["email"]["smtp_user"],
-            smtp_password=settings["email"]["smtp_password"],
-            from_email=settings["email"]["from_email"],
-            to_email=settings["email"]["to_email"],
-            use_tls=settings["email"]["use_tls"],
+            smtp_host=em["smtp_host"],
+            smtp_port=em["smtp_port"],
+            smtp_user=em["smtp_user"],
+            smtp_password=em["smtp_password"],
+            from_email=em["from_email"],
+            to_email=em["to_email"],
+            use_tls=em["use_tls"],
             lang=lang,
             logger=logger,
         )
-        logger.info(lang.t("email_enabled", email=settings["email"]["to_email"]))
+        logger.info(lang.t("email_enabled", email=em["to_email"]))
     else:
         logger.warn(lang.t("email_disabled"))
 
-    print("-" * 60)
+    print(_SEP)
     print("  Bot is running. Press Ctrl+C to stop and return to menu.")
-    print("-" * 60)
+    print(_SEP)
 
     # Mark bot as running
     import os
     bot_stats.set_running(True, pid=os.getpid())
 
-    # Configurable startup delay
-    startup_delay = settings.get("startup_delay_seconds", 300)
-    if startup_delay > 0:
-        logger.info(lang.t("startup_delay", seconds=startup_delay))
-        time.sleep(startup_delay)
-
-    crawler_exam_type = "ALL" if settings["telegram"].get("multi_user") else settings["exam_type"]
+    crawler_exam_type = "ALL" if tg.get("multi_user") else settings["exam_type"]
 
     crawler = CisiaCrawler(
         exam_type=crawler_exam_type,
@@ -143,9 +136,20 @@ def run_bot(settings):
         lang=lang,
     )
 
+    t_check_num = lang.t_template("check_number")
+    t_no_seats = lang.t("no_seats")
+    t_seats_found = lang.t_template("seats_found")
+
     check_count = 0
 
     try:
+        # Configurable startup delay
+        startup_delay = settings.get("startup_delay_seconds", 300)
+        if startup_delay > 0:
+            logger.info(lang.t("startup_delay", seconds=startup_delay))
+            if bot_stats.wait_for_stop(startup_delay):
+                return
+
         while True:
             # Check if web panel requested stop
             if not bot_stats.is_running():
@@ -153,11 +157,11 @@ def run_bot(settings):
                 break
 
             check_count += 1
-            logger.info(lang.t("check_number", n=check_count))
+            logger.info(t_check_num.format(n=check_count))
 
             try:
                 results = crawler.check_availability()
-                total_available = sum(len(seats) for seats in results.values())
+                total_available = sum(map(len, results.values()))
 
                 # Record stats
                 bot_stats.record_crawl(
@@ -166,25 +170,16 @@ def run_bot(settings):
                 )
 
                 if total_available > 0:
-                    logger.success(lang.t("seats_found", count=total_available))
+                    logger.success(t_seats_found.format(count=total_available))
 
+                    lbl_seats, lbl_date, lbl_deadline = lang.t("seats"), lang.t("date"), lang.t("deadline")
                     for exam_key, seats in results.items():
                         for seat in seats:
                             logger.success(
-                                "  [{exam}] {uni} - {city} | "
-                                "{lbl_seats}: {seats} | "
-                                "{lbl_date}: {date} | "
-                                "{lbl_deadline}: {deadline}".format(
-                                    exam=exam_key,
-                                    uni=seat["university"],
-                                    city=seat["city"],
-                                    lbl_seats=lang.t("seats"),
-                                    seats=seat["seats"],
-                                    lbl_date=lang.t("date"),
-                                    date=seat["date"],
-                                    lbl_deadline=lang.t("deadline"),
-                                    deadline=seat["deadline"],
-                                )
+                                f"  [{exam_key}] {seat['university']} - {seat['city']} | "
+                                f"{lbl_seats}: {seat['seats']} | "
+                                f"{lbl_date}: {seat['date']} | "
+                                f"{lbl_deadline}: {seat['deadline']}"
                             )
 
                     if telegram:
@@ -193,7 +188,7 @@ def run_bot(settings):
                     if email_notifier:
                         email_notifier.send_availability_alert(results)
                 else:
-                    logger.info(lang.t("no_seats"))
+                    logger.info(t_no_seats)
                     if telegram:
                         telegram.send_daily_no_spots(results)
 
@@ -201,42 +196,45 @@ def run_bot(settings):
                 logger.error(lang.t("error_check", error=str(e)))
                 bot_stats.record_error(str(e))
 
-            wait = scheduler.next_seconds()
+            wait = fixed_wait if fixed_wait is not None else scheduler.next_seconds()
 
             if settings["check_mode"] == "fixed":
                 logger.info(lang.t("next_check_fixed", minutes=settings["check_interval_minutes"]))
             else:
                 logger.info(lang.t("next_check_random", seconds=wait))
 
-            print("-" * 60)
+            print(_SEP)
 
-            # Sleep in 1s increments to allow checking stop flag
-            for _ in range(int(wait)):
-                if not bot_stats.is_running():
-                    break
-                time.sleep(1)
+            # Wake immediately on stop instead of polling every second
+            if bot_stats.wait_for_stop(int(wait)):
+                break
 
     except KeyboardInterrupt:
         pass
     finally:
         bot_stats.set_running(False)
+        crawler.close()
+        if telegram:
+            telegram.shutdown()
+        if email_notifier:
+            email_notifier.close()
         print("\n\n  Bot stopped. Returning to menu...\n")
 
 
 def main():
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-
     settings = load_settings()
 
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
     while True:
-        signal.signal(signal.SIGINT, signal_handler)
-
         choice = show_main_menu(settings)
 
         if choice == "1":
             signal.signal(signal.SIGINT, signal.default_int_handler)
-            run_bot(settings)
+            try:
+                run_bot(settings)
+            finally:
+                signal.signal(signal.SIGINT, signal_handler)
         elif choice == "2":
             settings = settings_menu(settings)
         elif choice == "3":
@@ -3,8 +3,80 @@ Email notification sender.
 """
 
 import smtplib
+import time
+from html import escape
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from string import Template
+
+# Availability alert page; {rows} is filled per alert, the rest once per notifier.
+_ALERT_HTML = """
+<html>
+<body style="font-family:Arial,sans-serif;max-width:900px;margin:0 auto;">
+    <div style="background:#004d8a;color:white;padding:20px;text-align:center;">
+        <h1>CISIA CRAWLER</h1>
+        <h2>{title}</h2>
+    </div>
+    <div style="padding:20px;">
+        <table style="width:100%;border-collapse:collapse;margin:20px 0;">
+            <thead>
+                <tr style="background:#f4f4f4;">
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_exam}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_fmt}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_uni}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_city}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_region}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_seats}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_date}</th>
+                    <th style="padding:8px;border:1px solid #ddd;">{lbl_deadline}</th>
+                </tr>
+            </thead>
+            <tbody>{rows}</tbody>
+        </table>
+        <p style="text-align:center;">
+            <a href="https://testcisia.it/studenti_tolc/login_sso.php"
+               style="background:#004d8a;color:white;padding:12px 24px;
+                      text-decoration:none;border-radius:5px;display:inline-block;">
+                {book}
+            </a>
+        </p>
+    </div>
+    <div style="background:#f4f4f4;padding:10px;text-align:center;font-size:12px;color:#666;">
+        CISIA CRAWLER v1.1.0 - Author: Kasra Falahati
+    </div>
+</body>
+</html>
+"""
+
+_TEST_HTML = """
+        <html><body style="font-family:Arial,sans-serif;text-align:center;padding:40px;">
+            <h2>CISIA CRAWLER</h2>
+            <p>{msg}</p>
+            <p style="color:#666;font-size:12px;">v1.1.0 - Author: Kasra Falahati</p>
+        </body></html>
+        """
+
+# Socket timeout for every SMTP operation, so a dead connection cannot
+# stall the crawl loop
+SMTP_TIMEOUT_SECONDS = 30
+
+# A cached connection idle for longer than this is reopened rather than
+# probed; most servers drop idle sessions after a few minutes anyway
+SMTP_IDLE_SECONDS = 240
+
+_TD = "<td style='padding:8px;border:1px solid #ddd;'>"
+_ROW_TMPL = (
+    "<tr>"
+    + _TD + "{exam}</td>"
+    + _TD + "{fmt}</td>"
+    + _TD + "{uni}</td>"
+    + _TD + "{city}</td>"
+    + _TD + "{region}</td>"
+    + _TD + "{seats}</td>"
+    + _TD + "{date}</td>"
+    + _TD + "{deadline}</td>"
+    "</tr>"
+)
 
 
 class EmailNotifier:
@@ -21,6 +93,72 @@ class EmailNotifier:
         self.use_tls = use_tls
         self.lang = lang
         self.logger = logger
+        self._smtp = None
+        self._smtp_used_at = 0.0
+        self.refresh_cache()
+
+    def refresh_cache(self):
+        """Rebuild the cached message bodies (call after changing self.lang)."""
+        lang = self.lang
+        self._test_body = _TEST_HTML.format(msg=lang.t("test_message"))
+        # Header, labels and footer never change between alerts
+        self._alert_subject = "CISIA CRAWLER - {}".format(lang.t("alert_title"))
+        self._alert_shell = Template(_ALERT_HTML.format(
+            title=lang.t("alert_title"),
+            lbl_exam=lang.t("exam"),
+            lbl_fmt=lang.t("format"),
+            lbl_uni=lang.t("university"),
+            lbl_city=lang.t("city"),
+            lbl_region=lang.t("region"),
+            lbl_seats=lang.t("seats"),
+            lbl_date=lang.t("date"),
+            lbl_deadline=lang.t("deadline"),
+            rows="$rows",
+            book=lang.t("book_now"),
+        ))
+
+    def _get_smtp(self):
+        """Return a logged-in SMTP connection, reusing the previous one if alive."""
+        now = time.monotonic()
+        if self._smtp is not None and now - self._smtp_used_at > SMTP_IDLE_SECONDS:
+            self._drop_smtp()
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                self._smtp_used_at = now
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._drop_smtp()
+
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        self._smtp = server
+        self._smtp_used_at = now
+        return server
+
+    def _drop_smtp(self):
+        """Forget the cached connection without talking to the server."""
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def close(self):
+        """Log out and close the cached SMTP connection."""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._drop_smtp()
 
     def _send_email(self, subject, html_body):
         """Send an HTML email."""
@@ -31,29 +169,18 @@ class EmailNotifier:
             msg["To"] = self.to_email
             msg.attach(MIMEText(html_body, "html", "utf-8"))
 
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                if self.use_tls:
-                    server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.sendmail(self.from_email, self.to_email, msg.as_string())
+            self._get_smtp().sendmail(self.from_email, self.to_email, msg.as_string())
 
             self.logger.info(self.lang.t("email_sent", email=self.to_email))
             return True
         except Exception as e:
+            self._drop_smtp()
             self.logger.error(self.lang.t("email_error", error=str(e)))
             return False
 
     def send_test(self):
         """Send a test email to verify connection."""
-        subject = "CISIA CRAWLER - Test Email"
-        body = """
-        <html><body style="font-family:Arial,sans-serif;text-align:center;padding:40px;">
-            <h2>CISIA CRAWLER</h2>
-            <p>{}</p>
-            <p style="color:#666;font-size:12px;">v1.1.0 - Author: Kasra Falahati</p>
-        </body></html>
-        """.format(self.lang.t("test_message"))
-        return self._send_email(subject, body)
+        return self._send_email("CISIA CRAWLER - Test Email", self._test_body)
 
     def send_availability_alert(self, results_by_exam):
         """Send an email alert with all available seats."""
@@ -64,80 +191,22 @@ class EmailNotifier:
         if not all_seats:
             return False
 
-        subject = "CISIA CRAWLER - {}".format(self.lang.t("alert_title"))
-
-        rows_html = ""
-        for seat in all_seats:
-            rows_html += (
-                "<tr>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{exam}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{fmt}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{uni}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{city}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{region}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{seats}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{date}</td>"
-                "<td style='padding:8px;border:1px solid #ddd;'>{deadline}</td>"
-                "</tr>"
-            ).format(
+        subject = self._alert_subject
+
+        rows_html = "".join(
+            _ROW_TMPL.format(
                 exam=seat.get("exam", ""),
-                fmt=seat["format"],
-                uni=seat["university"],
-                city=seat["city"],
-                region=seat["region"],
-                seats=seat["seats"],
-                date=seat["date"],
-                deadline=seat["deadline"],
+                fmt=escape(seat["format"], quote=False),
+                uni=escape(seat["university"], quote=False),
+                city=escape(seat["city"], quote=False),
+                region=escape(seat["region"], quote=False),
+                seats=escape(str(seat["seats"]), quote=False),
+                date=escape(seat["date"], quote=False),
+                deadline=escape(seat["deadline"], quote=False),
             )
-
-        html_body = """
-        <html>
-        <body style="font-family:Arial,sans-serif;max-width:900px;margin:0 auto;">
-            <div style="background:#004d8a;color:white;padding:20px;text-align:center;">
-                <h1>CISIA CRAWLER</h1>
-                <h2>{title}</h2>
-            </div>
-            <div style="padding:20px;">
-                <table style="width:100%;border-collapse:collapse;margin:20px 0;">
-                    <thead>
-                        <tr style="background:#f4f4f4;">
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_exam}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_fmt}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_uni}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_city}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_region}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_seats}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_date}</th>
-                            <th style="padding:8px;border:1px solid #ddd;">{lbl_deadline}</th>
-                        </tr>
-                    </thead>
-                    <tbody>{rows}</tbody>
-                </table>
-                <p style="text-align:center;">
-                    <a href="https://testcisia.it/studenti_tolc/login_sso.php"
-                       style="background:#004d8a;color:white;padding:12px 24px;
-                              text-decoration:none;border-radius:5px;display:inline-block;">
-                        {book}
-                    </a>
-                </p>
-            </div>
-            <div style="background:#f4f4f4;padding:10px;text-align:center;font-size:12px;color:#666;">
-                CISIA CRAWLER v1.1.0 - Author: Kasra Falahati
-            </div>
-        </body>
-        </html>
-        """.format(
-            title=self.lang.t("alert_title"),
-            lbl_exam=self.lang.t("exam"),
-            lbl_fmt=self.lang.t("format"),
-            lbl_uni=self.lang.t("university"),
-            lbl_city=self.lang.t("city"),
-            lbl_region=self.lang.t("region"),
-            lbl_seats=self.lang.t("seats"),
-            lbl_date=self.lang.t("date"),
-            lbl_deadline=self.lang.t("deadline"),
-            rows=rows_html,
-            book=self.lang.t("book_now"),
+            for seat in all_seats
         )
 
+        html_body = self._alert_shell.safe_substitute(rows=rows_html)
+
         return self._send_email(subject, html_body)
@@ -14,15 +14,28 @@ Architecture:
   - Non-premium users joining the premium group are kicked.
 """
 
+import hashlib
+from html import escape
+import os
+import queue
+import random
+import sys
 import requests
+from requests.adapters import HTTPAdapter
 import threading
 import time as _time
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 from config.settings import get_all_exam_keys
 from utils.subscribers import SubscriberManager
 from utils.github_stars import GitHubStarChecker, GITHUB_REPO_URL
 from utils.donators import DonatorManager, USDT_TRC20_ADDRESS
+from utils.atomic_file import atomic_write
+# orjson when installed, the stdlib otherwise
+from utils.jsonio import dumps as _json_dumps, loads as _json_loads
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 
 # ── Exam -> Group chat_id mapping ─────────────────────────────────────────
@@ -44,10 +57,177 @@ EXAM_GROUP_IDS = {
 # Premium group chat_id — populated at startup from config.yaml
 PREMIUM_GROUP_ID = ""
 
+# Exam keys never change at runtime
+_ALL_EXAM_KEYS = tuple(map(sys.intern, get_all_exam_keys()))
+_EXAM_BY_UPPER = {e.upper(): e for e in _ALL_EXAM_KEYS}
+
+# Telegram accepts roughly 30 messages per second per bot, 20 per minute
+# in a single group and about one per second in a private chat
+MAX_MESSAGES_PER_SECOND = 30
+MAX_GROUP_MESSAGES_PER_MINUTE = 20
+MAX_CHAT_MESSAGES_PER_SECOND = 1
+
+# The global send rate starts at the maximum, halves on every 429 (down to
+# MIN_MESSAGES_PER_SECOND) and recovers by RATE_RECOVERY_STEP per success
+MIN_MESSAGES_PER_SECOND = 1.0
+RATE_RECOVERY_STEP = 0.25
+
+# getUpdates long-poll timeout, split between notifiers sharing the poller
+POLL_TIMEOUT_SECONDS = 50
+
+# Updates are handled on this many single-thread lanes, one lane per user
+UPDATE_WORKERS = 4
+
+# Exam-group invite links are shared by everyone asking within one bucket
+INVITE_BUCKET_SECONDS = 30
+
+# Identical group broadcasts within this window are sent only once
+SEND_DEBOUNCE_SECONDS = 60
+
+# Chat types whose joins are verified by _handle_new_chat_members
+_GROUP_CHAT_TYPES = frozenset({"group", "supergroup"})
+
+# Posted in a group right before a member who may not be there is kicked
+_KICK_PREMIUM_TMPL = (
+    "\u274C <b>{name}</b>, this group is for <b>Premium</b> members only.\n\n"
+    "To become Premium:\n"
+    "1\uFE0F\u20E3 Send /donate in the bot DM\n"
+    "2\uFE0F\u20E3 Donate via USDT (TRC20)\n"
+    "3\uFE0F\u20E3 Submit your TX ID with /donate &lt;tx_id&gt;\n"
+    "4\uFE0F\u20E3 Wait for admin verification"
+)
+_KICK_UNVERIFIED_TMPL = (
+    "\u274C <b>{name}</b>, you must verify your GitHub star before "
+    "joining this group.\n\n"
+    "1\uFE0F\u20E3 Star the repo: {repo}\n"
+    "2\uFE0F\u20E3 Open the bot in DM and send:\n"
+    "    <code>/github your_github_username</code>\n"
+    "3\uFE0F\u20E3 Then use /exam to get a new invite link."
+)
+
+# Pending alert batches; shutdown() waits this long for them to go out
+OUTBOX_SIZE = 10000
+OUTBOX_DRAIN_SECONDS = 30
+
+# Retry backoff for network errors and 5xx answers (429 uses Retry-After)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Telegram rejects message texts longer than this
+MAX_MESSAGE_LENGTH = 4096
+_SUMMARY_TITLE = "\U0001F6A8 <b>{}</b>"
+_SUMMARY_SEPARATOR = "\n\n\u2501\u2501\u2501\u2501\u2501\u2501\u2501\u2501\u2501\u2501\n\n"
+
+# Next getUpdates offset per bot id, so a restart does not replay the last
+# batch of updates
+OFFSET_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "telegram_offset.json")
+_offset_lock = threading.Lock()
+
+# When each exam group last got its daily "no spots" notice, so a restart
+# does not send it again
+NO_SPOTS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "telegram_no_spots.json")
+
+
+def configure_group_ids(mapping, premium_id):
+    """Apply exam group and premium group chat_ids from config.yaml."""
+    global PREMIUM_GROUP_ID
+    EXAM_GROUP_IDS.update({sys.intern(k): v for k, v in mapping.items() if v})
+    PREMIUM_GROUP_ID = premium_id
+
+
+def _retry_after(resp):
+    """Seconds Telegram asks us to wait: the Retry-After header, else parameters.retry_after."""
+    try:
+        return int(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return int(_json_loads(resp.content)["parameters"]["retry_after"])
+    except Exception:
+        return 5
+
+
+def _load_offset(bot_id):
+    """Saved getUpdates offset for a bot, or 0 when there is none."""
+    try:
+        with open(OFFSET_FILE, "rb") as f:
+            return int(_json_loads(f.read()).get(bot_id, 0))
+    except Exception:
+        return 0
+
+
+def _save_offset(bot_id, offset):
+    """Record a bot's getUpdates offset; failures only cost a replay after restart."""
+    with _offset_lock:
+        try:
+            with open(OFFSET_FILE, "rb") as f:
+                offsets = _json_loads(f.read())
+        except Exception:
+            offsets = {}
+        offsets[bot_id] = offset
+        _write_json(OFFSET_FILE, offsets)
+
+
+def _load_no_spots():
+    """Saved {(group_id, exam_key): unix time} of daily no-spots notices."""
+    try:
+        with open(NO_SPOTS_FILE, "rb") as f:
+            return {(group_id, sys.intern(exam_key)): int(ts) for group_id, exam_key, ts in _json_loads(f.read())}
+    except Exception:
+        return {}
+
+
+def _write_json(path, data):
+    """Replace a small state file atomically; failures are ignored."""
+    try:
+        atomic_write(path, _json_dumps(data))
+    except OSError:
+        pass
+
+
+def _backoff_delay(attempt):
+    """Exponential backoff with up to 50% jitter for network and 5xx errors."""
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt * (1 + random.random() * 0.5))
+
+
+def _pack_messages(parts, sep=_SUMMARY_SEPARATOR, limit=MAX_MESSAGE_LENGTH):
+    """Join parts with sep into as few texts of at most `limit` chars as possible.
+    A part that is too long on its own is split on line boundaries."""
+    messages = []
+    current = ""
+    for part in parts:
+        if len(part) > limit:
+            pieces, piece = [], ""
+            for line in part.split("\n"):
+                if piece and len(piece) + 1 + len(line) > limit:
+                    pieces.append(piece)
+                    piece = line
+                else:
+                    piece = piece + "\n" + line if piece else line
+            pieces.append(piece)
+        else:
+            pieces = [part]
+        for piece in pieces:
+            if current and len(current) + len(sep) + len(piece) <= limit:
+                current += sep + piece
+            else:
+                if current:
+                    messages.append(current)
+                current = piece
+    if current:
+        messages.append(current)
+    return messages
+
 
 class TelegramNotifier:
     API_URL = "https://api.telegram.org/bot{token}/{method}"
 
+    # One daemon thread long-polls for every notifier that called
+    # start_polling(); it exits on its own once none are registered.
+    _poll_lock = threading.Lock()
+    _pollers = {}           # bot_token -> TelegramNotifier
+    _poll_thread = None
+
     def __init__(self, bot_token, chat_id, lang, logger,
                  message_count=5, multi_user=False, github_token=None):
         self.bot_token = bot_token
@@ -59,57 +239,226 @@ class TelegramNotifier:
 
         # Managers
         self.subscribers = SubscriberManager() if multi_user else None
-        self.github = GitHubStarChecker(github_token=github_token)
-        self.donators = DonatorManager()
+        # Only the interactive (polling) side uses these
+        self.github = GitHubStarChecker(github_token=github_token) if multi_user else None
+        self.donators = DonatorManager() if multi_user else None
+
+        # One keep-alive HTTPS session for every Telegram API call
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+        self._session.headers["Connection"] = "keep-alive"
+        self._api_base = self.API_URL.format(token=bot_token, method="")
+        self._bot_id = bot_token.split(":", 1)[0]    # the non-secret part
+
+        # Adaptive global token bucket plus per-chat send timestamps, shared
+        # by all sender threads
+        self._rate_lock = threading.Lock()
+        self._rate = float(MAX_MESSAGES_PER_SECOND)
+        self._tokens = float(MAX_MESSAGES_PER_SECOND)
+        self._refilled_at = _time.monotonic()
+        self._chat_sent_times = {}
+        self._chat_swept_at = self._refilled_at
+
+        # Group broadcasts are queued here and sent by a background thread,
+        # so the crawler loop never waits on Telegram
+        self._outbox = queue.Queue(maxsize=OUTBOX_SIZE)
+        self._outbox_lock = threading.Lock()
+        self._sender_thread = None
+
+        # chat_id -> (digest, monotonic time) of the last deduplicated send
+        self._last_sent_hash = {}
+
+        self._poll_url = self._api_base + "getUpdates"
+        # Same user -> same lane, so each user's updates stay in order while
+        # a slow handler (GitHub check, kick) does not stall everyone else
+        self._update_lanes = tuple(ThreadPoolExecutor(max_workers=1) for _ in range(UPDATE_WORKERS))
+        self._poll_params = {
+            "offset": 0, "timeout": POLL_TIMEOUT_SECONDS,
+            "allowed_updates": '["message"]',
+        }
+        self._last_no_spots_sent = _load_no_spots()     # (group_id, exam_key) -> unix time
 
-        self._polling_thread = None
-        self._last_no_spots_sent = defaultdict(dict)
+        # group_id -> (bucket, invite_link) for the shared exam-group links
+        self._invite_cache = {}
 
         # Admin donator-review state: admin_chat_id -> list of pending records
         self._admin_donator_state = {}
 
+        # Stringified once; _handle_update already works with str chat ids
+        self._admin_chat_id_str = str(chat_id) if chat_id else ""
+        self._premium_group_id_str = str(PREMIUM_GROUP_ID) if PREMIUM_GROUP_ID else ""
+
+        # Exams with a group chat; configure_group_ids() runs before construction
+        self._configured_exams = tuple((k, gid) for k, gid in EXAM_GROUP_IDS.items() if gid)
+
+        # Command dispatch tables, checked in this order by _handle_update and
+        # keyed by the first word of the message. Bare-command handlers take
+        # (chat_id, user_info); handlers for "/cmd <arg>" take
+        # (chat_id, arg, user_info).
+        self._open_cmds = {
+            "/start": self._cmd_start,
+            "/donate": lambda chat_id, user_info: self._cmd_donate_info(chat_id),
+        }
+        self._open_arg_cmds = {
+            "/donate": self._cmd_donate_submit,
+            "/github": self._cmd_verify_star,
+            "/star": self._cmd_verify_star,
+        }
+        self._admin_cmds = {
+            "/interval": lambda chat_id, user_info: self._send_message(chat_id, self._interval_info_msg),
+            "/donators": lambda chat_id, user_info: self._cmd_donators_list(chat_id),
+        }
+        self._admin_arg_cmds = {
+            "/interval": lambda chat_id, arg, user_info: self._cmd_set_interval(chat_id, arg),
+        }
+        self._verified_cmds = {
+            "/stop": self._cmd_stop,
+            "/exam": self._cmd_exam_menu,
+            "/exams": self._cmd_exam_menu,
+            "/status": self._cmd_status,
+            "/help": self._cmd_help,
+        }
+
+        self.refresh_cache()
+
+    def refresh_cache(self):
+        """Rebuild the cached static replies (call after changing self.lang)."""
+        t = self.lang.t
+        self._test_msg = "<b>CISIA CRAWLER</b>\n\n{}".format(t("test_message"))
+        self._welcome_msg = t("bot_welcome_v2")
+        self._help_msg = t("help_message")
+        self._donate_msg = t("donate_info", address=USDT_TRC20_ADDRESS)
+        self._interval_info_msg = t("interval_info")
+        self._fmt_daily_no_spots = self.lang.t_template("daily_no_spots").format
+        self._summary_line = (
+            "\U0001F4CD <b>{region}</b> \u2013 {city}: {seats} " + t("seats")
+            + ", {dates} " + t("dates")
+        )
+        self._summary_footer = (
+            "\n\U0001F517 <a href='https://testcisia.it/studenti_tolc/login_sso.php'>"
+            "\U0001F4CC {}</a>".format(t("book_now"))
+        )
+        self._exam_menu_msg = t("exam_select_prompt") + "\n\n" + "\n".join(
+            "{}. {}".format(i, exam) for i, exam in enumerate(_ALL_EXAM_KEYS, 1)
+        )
+
     # ──────────────────────────────────────────────────────────────────────
     # Helpers
     # ──────────────────────────────────────────────────────────────────────
 
     def _is_admin(self, chat_id):
-        """Check if a chat_id is the admin."""
-        return self.chat_id and str(chat_id) == str(self.chat_id)
+        """Check if a (str) chat_id is the admin."""
+        return bool(self._admin_chat_id_str) and chat_id == self._admin_chat_id_str
 
     # ──────────────────────────────────────────────────────────────────────
     # Low-level Telegram API
     # ──────────────────────────────────────────────────────────────────────
 
-    def _call_api(self, method, payload=None, max_retries=3):
-        url = self.API_URL.format(token=self.bot_token, method=method)
+    def _call_api(self, method, payload=None, max_retries=6):
+        url = self._api_base + method
+        body = _json_dumps(payload or {})
         for attempt in range(max_retries):
             try:
-                resp = requests.post(url, json=payload or {}, timeout=20)
-                if resp.status_code == 429:
-                    try:
-                        data = resp.json() or {}
-                    except Exception:
-                        data = {}
-                    retry_after = 5
-                    if isinstance(data, dict):
-                        retry_after = data.get("parameters", {}).get("retry_after") or retry_after
-                    self.logger.warn(self.lang.t("telegram_rate_limited", seconds=retry_after))
-                    _time.sleep(int(retry_after) + 1)
-                    continue
-                if 500 <= resp.status_code < 600:
-                    _time.sleep(2)
-                    continue
-                resp.raise_for_status()
-                return resp.json()
+                resp = self._session.post(url, data=body, headers=_JSON_HEADERS, timeout=20)
+                status = resp.status_code
+                if status == 429:
+                    self._adapt_rate(rate_limited=True)
+                    if attempt < max_retries - 1:
+                        retry_after = _retry_after(resp)
+                        self.logger.warn(self.lang.t("telegram_rate_limited", seconds=retry_after))
+                        _time.sleep(retry_after + 1)
+                        continue
+                elif status < 500:
+                    data = _json_loads(resp.content)
+                    if status >= 400:
+                        # Bad request, blocked bot, missing chat... retrying won't help
+                        self.logger.error(self.lang.t("telegram_error", error="{} {}: {}".format(
+                            method, status, data.get("description", ""))))
+                    return data
+                error = "HTTP {}".format(status)
             except Exception as e:
-                if attempt == max_retries - 1:
-                    self.logger.error(self.lang.t("telegram_error", error=str(e)))
-                    return None
-                _time.sleep(2)
+                error = str(e)
+            if attempt == max_retries - 1:
+                self.logger.error(self.lang.t("telegram_error", error="{}: {}".format(method, error)))
+                return None
+            delay = _backoff_delay(attempt)
+            self.logger.warn("Telegram {} failed ({}), retry {}/{} in {:.1f}s".format(
+                method, error, attempt + 1, max_retries - 1, delay))
+            _time.sleep(delay)
         return None
 
+    def shutdown(self):
+        """Stop polling, flush queued alerts and close the pooled HTTP connections."""
+        self.stop_polling()
+        for lane in self._update_lanes:
+            lane.shutdown(wait=False)
+        with self._outbox_lock:
+            sender, self._sender_thread = self._sender_thread, None
+        if sender is not None:
+            self._outbox.put(None)
+            sender.join(OUTBOX_DRAIN_SECONDS)
+        self._session.close()
+
+    def _throttle(self, chat_id):
+        """Block until the global token bucket and the per-chat window both allow a send."""
+        key = str(chat_id)
+        if key.startswith("-"):
+            limit, window = MAX_GROUP_MESSAGES_PER_MINUTE, 60.0
+        else:
+            limit, window = MAX_CHAT_MESSAGES_PER_SECOND, 1.0
+        while True:
+            with self._rate_lock:
+                now = _time.monotonic()
+                self._tokens = min(float(MAX_MESSAGES_PER_SECOND),
+                                   self._tokens + (now - self._refilled_at) * self._rate)
+                self._refilled_at = now
+                if now - self._chat_swept_at >= 60.0:
+                    self._sweep_chat_sent_times(now)
+                chat_sent = self._chat_sent_times.get(key)
+                if chat_sent is not None:
+                    while chat_sent and now - chat_sent[0] >= window:
+                        chat_sent.popleft()
+                    if not chat_sent:
+                        del self._chat_sent_times[key]
+                        chat_sent = None
+                wait = 0.0
+                if self._tokens < 1.0:
+                    wait = (1.0 - self._tokens) / self._rate
+                if chat_sent is not None and len(chat_sent) >= limit:
+                    wait = max(wait, window - (now - chat_sent[0]))
+                if wait <= 0:
+                    self._tokens -= 1.0
+                    if chat_sent is None:
+                        self._chat_sent_times[key] = deque((now,))
+                    else:
+                        chat_sent.append(now)
+                    return
+            # Sleep outside the lock so sends to other chats keep flowing
+            _time.sleep(wait)
+
+    def _sweep_chat_sent_times(self, now):
+        """Drop chats with no send in the last minute. Caller holds _rate_lock."""
+        self._chat_sent_times = {
+            k: v for k, v in self._chat_sent_times.items() if now - v[-1] < 60.0
+        }
+        self._chat_swept_at = now
+
+    def _adapt_rate(self, rate_limited):
+        """Halve the send rate after a 429, creep back up after each success."""
+        with self._rate_lock:
+            if rate_limited:
+                self._rate = max(MIN_MESSAGES_PER_SECOND, self._rate * 0.5)
+            else:
+                self._rate = min(float(MAX_MESSAGES_PER_SECOND), self._rate + RATE_RECOVERY_STEP)
+
     def _send_message(self, chat_id, text, parse_mode="HTML",
-                      disable_preview=True, reply_markup=None):
+                      disable_preview=True, reply_markup=None, dedupe=False):
+        if dedupe:
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            last = self._last_sent_hash.get(chat_id)
+            if last and last[0] == digest and _time.monotonic() - last[1] < SEND_DEBOUNCE_SECONDS:
+                return True
+        self._throttle(chat_id)
         payload = {
             "chat_id": chat_id,
             "text": text,
@@ -119,7 +468,12 @@ class TelegramNotifier:
         if reply_markup:
             payload["reply_markup"] = reply_markup
         result = self._call_api("sendMessage", payload)
-        return bool(result and result.get("ok"))
+        ok = bool(result and result.get("ok"))
+        if ok:
+            self._adapt_rate(rate_limited=False)
+        if ok and dedupe:
+            self._last_sent_hash[chat_id] = (digest, _time.monotonic())
+        return ok
 
     # ──────────────────────────────────────────────────────────────────────
     # Invite link management
@@ -130,8 +484,9 @@ class TelegramNotifier:
         payload = {
             "chat_id": group_chat_id,
             "expire_date": expire_date,
-            "member_limit": member_limit,
         }
+        if member_limit:
+            payload["member_limit"] = member_limit
         result = self._call_api("createChatInviteLink", payload)
         if result and result.get("ok"):
             return result["result"].get("invite_link")
@@ -143,11 +498,13 @@ class TelegramNotifier:
 
     def _kick_member(self, chat_id, user_id, first_name="", reason="unverified"):
         """Ban then immediately unban so user can rejoin later."""
-        self._call_api("banChatMember", {"chat_id": chat_id, "user_id": user_id})
-        _time.sleep(0.5)
-        self._call_api("unbanChatMember", {
-            "chat_id": chat_id, "user_id": user_id, "only_if_banned": True,
-        })
+        # The ban is applied by the time Telegram answers; _call_api already
+        # retries a failed unban with backoff
+        result = self._call_api("banChatMember", {"chat_id": chat_id, "user_id": user_id})
+        if result and result.get("ok"):
+            self._call_api("unbanChatMember", {
+                "chat_id": chat_id, "user_id": user_id, "only_if_banned": True,
+            })
         self.logger.warn("Kicked {} user {} ({}) from group {}".format(
             reason, first_name, user_id, chat_id))
 
@@ -156,32 +513,27 @@ class TelegramNotifier:
     # ──────────────────────────────────────────────────────────────────────
 
     def _format_exam_summary(self, exam_key, seats):
-        groups = {}
+        seat_totals = Counter()
+        dates = defaultdict(set)
         for s in seats:
             key = (s.get("region", ""), s.get("city", ""))
-            g = groups.setdefault(key, {"seats": 0, "dates": set()})
-            try:
-                g["seats"] += int(str(s.get("seats", "0")).strip())
-            except Exception:
-                g["seats"] += 1
+            count = s.get("seats", 0)
+            # The scraper gives an int count, or the raw cell text (e.g. "---")
+            # when a slot is open but its count is not shown
+            seat_totals[key] += count if type(count) is int else 1
             d = str(s.get("date", "")).strip()
             if d:
-                g["dates"].add(d)
+                dates[key].add(d)
 
-        lines = ["\U0001F6A8 <b>{}</b>".format(exam_key), ""]
-        for (region, city), g in sorted(groups.items(), key=lambda x: (x[0][0], x[0][1])):
-            lines.append(
-                "\U0001F4CD <b>{region}</b> \u2013 {city}: {seats} {lbl_seats}, "
-                "{dates} {lbl_dates}".format(
-                    region=region or "-", city=city or "-",
-                    seats=g["seats"], lbl_seats=self.lang.t("seats"),
-                    dates=len(g["dates"]), lbl_dates=self.lang.t("dates"),
-                ))
+        line = self._summary_line
+        lines = [_SUMMARY_TITLE.format(exam_key), ""]
         lines += [
-            "",
-            "\U0001F517 <a href='https://testcisia.it/studenti_tolc/login_sso.php'>"
-            "\U0001F4CC {}</a>".format(self.lang.t("book_now")),
+            line.format(region=escape(region, quote=False) or "-",
+                        city=escape(city, quote=False) or "-",
+                        seats=total, dates=len(dates.get((region, city), ())))
+            for (region, city), total in sorted(seat_totals.items())
         ]
+        lines.append(self._summary_footer)
         return "\n".join(lines)
 
     # ──────────────────────────────────────────────────────────────────────
@@ -189,37 +541,72 @@ class TelegramNotifier:
     # ──────────────────────────────────────────────────────────────────────
 
     def send_availability_alert(self, results_by_exam):
-        for exam_key, seats in results_by_exam.items():
-            if not seats:
-                continue
-            group_id = EXAM_GROUP_IDS.get(exam_key)
-            if not group_id:
-                continue
-            message = self._format_exam_summary(exam_key, seats)
-            self._send_message(group_id, message)
-            _time.sleep(0.5)
+        # Most crawls find nothing anywhere
+        if not any(results_by_exam.values()):
+            return
+        # Exams sharing a group go out as one message (split at 4096 chars)
+        by_group = {}
+        for exam_key, group_id in self._configured_exams:
+            seats = results_by_exam.get(exam_key, ())
+            if seats:
+                by_group.setdefault(group_id, []).append(self._format_exam_summary(exam_key, seats))
+        if by_group:
+            self._enqueue(by_group)
 
     def send_daily_no_spots(self, results_by_exam, hours=24):
         now = int(_time.time())
-        interval = int(hours * 3600)
-        for exam_key in get_all_exam_keys():
-            group_id = EXAM_GROUP_IDS.get(exam_key)
-            if not group_id:
-                continue
-            seats = results_by_exam.get(exam_key, [])
-            if seats:
+        # Anything sent after the cutoff is still within its quiet period
+        cutoff = now - int(hours * 3600)
+        last_sent = self._last_no_spots_sent
+        by_group = {}
+        for exam_key, group_id in self._configured_exams:
+            if results_by_exam.get(exam_key):
                 continue
-            last = self._last_no_spots_sent.get(group_id, {}).get(exam_key, 0)
-            if now - int(last) < interval:
+            key = (group_id, exam_key)
+            if last_sent.get(key, 0) > cutoff:
                 continue
-            msg = self.lang.t("daily_no_spots", exam=exam_key)
-            self._send_message(group_id, msg)
-            self._last_no_spots_sent.setdefault(group_id, {})[exam_key] = now
-            _time.sleep(0.5)
+            by_group.setdefault(group_id, []).append(self._fmt_daily_no_spots(exam=exam_key))
+            last_sent[key] = now
+        if by_group:
+            self._enqueue(by_group)
+            _write_json(NO_SPOTS_FILE, [[g, e, ts] for (g, e), ts in last_sent.items()])
+
+    # ── Outbox ──
+
+    def _enqueue(self, by_group):
+        """Queue {group_id: [texts]} for the sender thread, starting it if needed."""
+        with self._outbox_lock:
+            if self._sender_thread is None:
+                self._sender_thread = threading.Thread(target=self._sender_loop, daemon=True)
+                self._sender_thread.start()
+        try:
+            self._outbox.put_nowait(by_group)
+        except queue.Full:
+            self.logger.error("Telegram outbox full, dropping alerts for {} group(s)".format(len(by_group)))
+
+    def _sender_loop(self):
+        while True:
+            by_group = self._outbox.get()
+            if by_group is None:
+                return
+            try:
+                self._deliver(by_group)
+            except Exception as e:
+                self.logger.error(self.lang.t("telegram_error", error=str(e)))
+
+    def _deliver(self, by_group):
+        def send_group(job):
+            group_id, texts = job
+            # Texts for one group go out in order, packed up to 4096 chars
+            for text in _pack_messages(texts):
+                self._send_message(group_id, text, dedupe=True)
+
+        # Different groups are independent; _throttle() keeps the rate limits
+        with ThreadPoolExecutor(max_workers=len(by_group)) as pool:
+            list(pool.map(send_group, by_group.items()))
 
     def test_connection(self):
-        test_msg = "<b>CISIA CRAWLER</b>\n\n{}".format(self.lang.t("test_message"))
-        return self._send_message(self.chat_id, test_msg)
+        return self._send_message(self.chat_id, self._test_msg)
 
     # ──────────────────────────────────────────────────────────────────────
     # Polling
@@ -228,28 +615,64 @@ class TelegramNotifier:
     def start_polling(self):
         if not self.multi_user:
             return
-        self._polling_thread = threading.Thread(target=self._poll_loop, daemon=True)
-        self._polling_thread.start()
+        cls = TelegramNotifier
+        # Resume after the last update handled before a restart
+        self._poll_params["offset"] = _load_offset(self._bot_id)
+        with cls._poll_lock:
+            # A newer notifier for the same bot replaces the previous one
+            cls._pollers[self.bot_token] = self
+            if cls._poll_thread is None:
+                cls._poll_thread = threading.Thread(target=cls._poll_loop, daemon=True)
+                cls._poll_thread.start()
         self.logger.info(self.lang.t("telegram_multiuser"))
 
-    def _poll_loop(self):
-        offset = 0
+    def stop_polling(self):
+        cls = TelegramNotifier
+        with cls._poll_lock:
+            if cls._pollers.get(self.bot_token) is self:
+                del cls._pollers[self.bot_token]
+
+    @classmethod
+    def _poll_loop(cls):
         while True:
-            try:
-                url = self.API_URL.format(token=self.bot_token, method="getUpdates")
-                resp = requests.get(url, params={
-                    "offset": offset, "timeout": 30,
-                    "allowed_updates": '["message","chat_member"]',
-                }, timeout=35)
-                data = resp.json()
-                if not data.get("ok"):
-                    _time.sleep(5)
-                    continue
-                for update in data.get("result", []):
-                    offset = update["update_id"] + 1
-                    self._handle_update(update)
-            except Exception:
+            with cls._poll_lock:
+                notifiers = list(cls._pollers.values())
+                if not notifiers:
+                    cls._poll_thread = None
+                    return
+            timeout = max(1, POLL_TIMEOUT_SECONDS // len(notifiers))
+            for notifier in notifiers:
+                notifier._poll_once(timeout)
+
+    def _poll_once(self, timeout):
+        # Only the offset changes between long-polls, and the pooled
+        # session keeps the same connection open across them.
+        params = self._poll_params
+        params["timeout"] = timeout
+        try:
+            resp = self._session.get(self._poll_url, params=params, timeout=timeout + 5)
+            data = _json_loads(resp.content)
+            if not data.get("ok"):
                 _time.sleep(5)
+                return
+            result = data.get("result")
+            if not result:
+                return          # long-poll timed out with no updates
+            lanes, handle = self._update_lanes, self._handle_update
+            offset = params["offset"]
+            for update in result:
+                update_id = update["update_id"]
+                if update_id < offset:
+                    continue    # already handed to a lane
+                offset = params["offset"] = update_id + 1
+                user_id = (update.get("message") or {}).get("from", {}).get("id", 0)
+                try:
+                    lanes[hash(user_id) % UPDATE_WORKERS].submit(handle, update)
+                except RuntimeError:
+                    return      # shutdown() ran while this poll was in flight
+            _save_offset(self._bot_id, offset)
+        except Exception:
+            _time.sleep(5)
 
     # ──────────────────────────────────────────────────────────────────────
     # Update router
@@ -260,19 +683,25 @@ class TelegramNotifier:
         if not message:
             return
 
+        chat = message.get("chat") or {}
+        chat_type = chat.get("type")
+
         # Handle new chat members (group join verification)
         new_members = message.get("new_chat_members", [])
-        if new_members and message.get("chat", {}).get("type") in ("group", "supergroup"):
+        if new_members and chat_type in _GROUP_CHAT_TYPES:
             self._handle_new_chat_members(message, new_members)
             return
 
         if "text" not in message:
             return
-        if message.get("chat", {}).get("type") != "private":
+        if chat_type != "private":
             return
 
-        chat_id = str(message["chat"]["id"])
+        chat_id = str(chat["id"])
         text = message["text"].strip()
+        # text is stripped, so arg is non-empty whenever a space was present
+        cmd, _, arg = text.partition(" ")
+        arg = arg.lstrip()
 
         user = message.get("from", {})
         user_info = {
@@ -282,49 +711,39 @@ class TelegramNotifier:
             "last_name": user.get("last_name", ""),
         }
 
+        is_admin = self._is_admin(chat_id)
+
         # ── Check if admin is in donator-review flow ──
-        if self._is_admin(chat_id) and chat_id in self._admin_donator_state:
+        if is_admin and chat_id in self._admin_donator_state:
             self._handle_donator_review_reply(chat_id, text)
             return
 
         # ── Commands that work WITHOUT star verification ──
 
-        if text == "/start":
-            self._cmd_start(chat_id, user_info)
-            return
-
-        if text == "/donate":
-            self._cmd_donate_info(chat_id)
-            return
-
-        if text.startswith("/donate "):
-            tx_id = text[len("/donate "):].strip()
-            if tx_id:
-                self._cmd_donate_submit(chat_id, tx_id, user_info)
-            else:
-                self._cmd_donate_info(chat_id)
-            return
-
-        if text.startswith("/github ") or text.startswith("/star "):
-            parts = text.split(None, 1)
-            if len(parts) == 2:
-                self._cmd_verify_star(chat_id, parts[1].strip(), user_info)
-            else:
-                self._send_message(chat_id, self.lang.t("github_usage"))
-            return
+        if arg:
+            handler = self._open_arg_cmds.get(cmd)
+            if handler:
+                handler(chat_id, arg, user_info)
+                return
+        else:
+            handler = self._open_cmds.get(cmd)
+            if handler:
+                handler(chat_id, user_info)
+                return
 
         # ── Admin-only commands (before star gate) ──
 
-        if self._is_admin(chat_id):
-            if text == "/interval":
-                self._send_message(chat_id, self.lang.t("interval_info"))
-                return
-            if text.startswith("/interval "):
-                self._cmd_set_interval(chat_id, text)
-                return
-            if text == "/donators":
-                self._cmd_donators_list(chat_id)
-                return
+        if is_admin:
+            if arg:
+                handler = self._admin_arg_cmds.get(cmd)
+                if handler:
+                    handler(chat_id, arg, user_info)
+                    return
+            else:
+                handler = self._admin_cmds.get(cmd)
+                if handler:
+                    handler(chat_id, user_info)
+                    return
 
         # ── Star verification gate ──
 
@@ -335,16 +754,11 @@ class TelegramNotifier:
 
         # ── Commands that require star verification ──
 
-        if text == "/stop":
-            self._cmd_stop(chat_id)
-        elif text == "/exam" or text == "/exams":
-            self._cmd_exam_menu(chat_id)
-        elif text == "/status":
-            self._cmd_status(chat_id)
-        elif text == "/help":
-            self._cmd_help(chat_id)
+        handler = None if arg else self._verified_cmds.get(cmd)
+        if handler:
+            handler(chat_id)
         else:
-            self._try_parse_exam_selection(chat_id, text)
+            self._try_parse_exam_selection(chat_id, text, sub)
 
     # ──────────────────────────────────────────────────────────────────────
     # Group join verification
@@ -356,22 +770,19 @@ class TelegramNotifier:
         - Premium group: must be a verified donator
         """
         group_chat_id = str(message["chat"]["id"])
-        is_premium_group = PREMIUM_GROUP_ID and group_chat_id == str(PREMIUM_GROUP_ID)
+        premium_gid_str = self._premium_group_id_str
+        is_premium_group = bool(premium_gid_str) and group_chat_id == premium_gid_str
+        subscribers = self.subscribers
 
         for member in new_members:
             if member.get("is_bot", False):
                 continue
 
-            user_id = member.get("id")
+            user_id = member.get("id")      # int, as sent by Telegram
             first_name = member.get("first_name", "Unknown")
 
             # Look up subscriber record by user_id
-            sub_record = None
-            if self.subscribers:
-                for rec in self.subscribers.get_all_subscribers():
-                    if str(rec.get("user_id")) == str(user_id):
-                        sub_record = rec
-                        break
+            sub_record = subscribers.get_by_user_id(user_id) if subscribers else None
 
             if is_premium_group:
                 # Premium group: must be a verified donator
@@ -380,14 +791,7 @@ class TelegramNotifier:
                     is_premium = self.donators.is_verified_donator(sub_record.get("chat_id", ""))
 
                 if not is_premium:
-                    kick_msg = (
-                        "\u274C <b>{name}</b>, this group is for <b>Premium</b> members only.\n\n"
-                        "To become Premium:\n"
-                        "1\uFE0F\u20E3 Send /donate in the bot DM\n"
-                        "2\uFE0F\u20E3 Donate via USDT (TRC20)\n"
-                        "3\uFE0F\u20E3 Submit your TX ID with /donate &lt;tx_id&gt;\n"
-                        "4\uFE0F\u20E3 Wait for admin verification"
-                    ).format(name=first_name)
+                    kick_msg = _KICK_PREMIUM_TMPL.format_map({"name": first_name})
                     self._send_message(group_chat_id, kick_msg)
                     _time.sleep(1)
                     self._kick_member(group_chat_id, user_id, first_name, "non-premium")
@@ -396,14 +800,7 @@ class TelegramNotifier:
                 verified = sub_record and sub_record.get("github_verified", False)
 
                 if not verified:
-                    kick_msg = (
-                        "\u274C <b>{name}</b>, you must verify your GitHub star before "
-                        "joining this group.\n\n"
-                        "1\uFE0F\u20E3 Star the repo: {repo}\n"
-                        "2\uFE0F\u20E3 Open the bot in DM and send:\n"
-                        "    <code>/github your_github_username</code>\n"
-                        "3\uFE0F\u20E3 Then use /exam to get a new invite link."
-                    ).format(name=first_name, repo=GITHUB_REPO_URL)
+                    kick_msg = _KICK_UNVERIFIED_TMPL.format_map({"name": first_name, "repo": GITHUB_REPO_URL})
                     self._send_message(group_chat_id, kick_msg)
                     _time.sleep(1)
                     self._kick_member(group_chat_id, user_id, first_name, "unverified")
@@ -414,7 +811,7 @@ class TelegramNotifier:
 
     def _cmd_start(self, chat_id, user_info):
         is_new = self.subscribers.subscribe(chat_id, user_info=user_info)
-        self._send_message(chat_id, self.lang.t("bot_welcome_v2"))
+        self._send_message(chat_id, self._welcome_msg)
         if is_new:
             name = "{} {}".format(
                 user_info.get("first_name", ""),
@@ -434,28 +831,21 @@ class TelegramNotifier:
     # ── Donate ──
 
     def _cmd_donate_info(self, chat_id):
-        msg = self.lang.t("donate_info", address=USDT_TRC20_ADDRESS)
-        self._send_message(chat_id, msg)
+        self._send_message(chat_id, self._donate_msg)
 
     def _cmd_donate_submit(self, chat_id, tx_id, user_info):
         self.donators.add_donation(chat_id, tx_id, user_info=user_info)
         self._send_message(chat_id, self.lang.t("donate_submitted", tx_id=tx_id))
 
         # Notify admin
+        name = f"{user_info.get('first_name', '')} {user_info.get('last_name', '')}".strip()
+        username = user_info.get("username", "N/A")
         admin_msg = (
             "\U0001F4B0 <b>New Donation Claim</b>\n\n"
-            "User: {name} (@{username})\n"
-            "Chat ID: {chat_id}\n"
-            "TX ID: <code>{tx_id}</code>\n\n"
+            f"User: {name} (@{username})\n"
+            f"Chat ID: {chat_id}\n"
+            f"TX ID: <code>{tx_id}</code>\n\n"
             "Use /donators to review."
-        ).format(
-            name="{} {}".format(
-                user_info.get("first_name", ""),
-                user_info.get("last_name", ""),
-            ).strip(),
-            username=user_info.get("username", "N/A"),
-            chat_id=chat_id,
-            tx_id=tx_id,
         )
         if self.chat_id:
             self._send_message(self.chat_id, admin_msg)
@@ -501,12 +891,7 @@ class TelegramNotifier:
     # ── Exam selection ──
 
     def _cmd_exam_menu(self, chat_id):
-        all_exams = get_all_exam_keys()
-        lines = []
-        for i, exam in enumerate(all_exams, 1):
-            lines.append("{}. {}".format(i, exam))
-        prompt = self.lang.t("exam_select_prompt") + "\n\n" + "\n".join(lines)
-        self._send_message(chat_id, prompt)
+        self._send_message(chat_id, self._exam_menu_msg)
 
     def _cmd_status(self, chat_id):
         sub = self.subscribers.get_subscriber(chat_id)
@@ -521,34 +906,30 @@ class TelegramNotifier:
         has_pending = self.donators.is_donator(chat_id) and not is_premium
         pending_str = " (pending verification)" if has_pending else ""
 
+        active = "Yes" if sub["active"] else "No"
         msg = (
             "<b>Your Status</b>\n\n"
-            "Active: {active}\n"
-            "GitHub: @{gh} {verified}\n"
-            "Premium: {premium}{pending}"
-        ).format(
-            active="Yes" if sub["active"] else "No",
-            gh=gh, verified=verified,
-            premium=premium_str, pending=pending_str,
+            f"Active: {active}\n"
+            f"GitHub: @{gh} {verified}\n"
+            f"Premium: {premium_str}{pending_str}"
         )
         self._send_message(chat_id, msg)
 
     def _cmd_help(self, chat_id):
-        self._send_message(chat_id, self.lang.t("help_message"))
+        self._send_message(chat_id, self._help_msg)
 
     # ── Admin-only: interval ──
 
-    def _cmd_set_interval(self, chat_id, text):
+    def _cmd_set_interval(self, chat_id, arg):
         try:
-            parts = text.split()
-            minutes = int(parts[1])
+            minutes = int(arg.split(None, 1)[0])
             if minutes < 1 or minutes > 60:
                 self._send_message(chat_id, "Interval must be between 1 and 60 minutes.")
                 return
             if self.subscribers:
                 self.subscribers.set_interval(chat_id, minutes)
             self._send_message(chat_id, self.lang.t("interval_set", minutes=minutes))
-        except (ValueError, IndexError):
+        except ValueError:
             self._send_message(chat_id, "Usage: /interval <minutes> (1-60)")
 
     # ── Admin-only: donators review ──
@@ -581,8 +962,10 @@ class TelegramNotifier:
             "Send /cancel to exit."
         )
 
-        # Store the pending list so we can reference it by index
-        self._admin_donator_state[chat_id] = {"step": "select", "pending": pending}
+        # Keep only the chat_ids; records are re-read from DonatorManager
+        self._admin_donator_state[chat_id] = {
+            "step": "select", "ids": [str(rec.get("chat_id", "")) for rec in pending],
+        }
         self._send_message(chat_id, "\n".join(lines))
 
     def _handle_donator_review_reply(self, chat_id, text):
@@ -602,13 +985,16 @@ class TelegramNotifier:
             # Admin is selecting a donator by number
             try:
                 idx = int(text.strip())
-                pending = state["pending"]
-                if idx < 1 or idx > len(pending):
-                    self._send_message(chat_id, "Invalid number. Enter 1-{}.".format(len(pending)))
+                ids = state["ids"]
+                if idx < 1 or idx > len(ids):
+                    self._send_message(chat_id, "Invalid number. Enter 1-{}.".format(len(ids)))
                     return
 
-                selected = pending[idx - 1]
-                state["selected"] = selected
+                selected = self.donators.get_donator(ids[idx - 1])
+                if not selected:
+                    self._send_message(chat_id, "That claim no longer exists. Send another number or /cancel.")
+                    return
+                state["selected_id"] = ids[idx - 1]
                 state["step"] = "action"
 
                 name = "{} {}".format(
@@ -638,8 +1024,8 @@ class TelegramNotifier:
                 self._send_message(chat_id, "Send a number or /cancel.")
 
         elif step == "action":
-            selected = state.get("selected", {})
-            target_chat_id = str(selected.get("chat_id", ""))
+            target_chat_id = state.get("selected_id", "")
+            selected = self.donators.get_donator(target_chat_id) or {}
             name = "{} {}".format(
                 selected.get("first_name", ""),
                 selected.get("last_name", ""),
@@ -694,31 +1080,27 @@ class TelegramNotifier:
 
     # ── Exam selection parsing ──
 
-    def _try_parse_exam_selection(self, chat_id, text):
-        sub = self.subscribers.get_subscriber(chat_id) if self.subscribers else None
+    def _try_parse_exam_selection(self, chat_id, text, sub):
+        """`sub` is the subscriber record _handle_update already looked up."""
         if not sub or not sub.get("active"):
             return
         if not sub.get("github_verified"):
             self._send_message(chat_id, self.lang.t("github_required"))
             return
 
-        all_exams = get_all_exam_keys()
+        text = text.strip()
 
         # Try number
-        try:
-            idx = int(text.strip())
-            if 1 <= idx <= len(all_exams):
-                self._send_invite_link(chat_id, all_exams[idx - 1])
-                return
-        except ValueError:
-            pass
+        if text.isdecimal():
+            idx = int(text)
+            if 1 <= idx <= len(_ALL_EXAM_KEYS):
+                self._send_invite_link(chat_id, _ALL_EXAM_KEYS[idx - 1])
+            return
 
         # Try exact exam name
-        text_upper = text.strip().upper()
-        for exam in all_exams:
-            if text_upper == exam.upper():
-                self._send_invite_link(chat_id, exam)
-                return
+        exam = _EXAM_BY_UPPER.get(text.upper())
+        if exam:
+            self._send_invite_link(chat_id, exam)
 
     def _send_invite_link(self, chat_id, exam_key):
         group_id = EXAM_GROUP_IDS.get(exam_key)
@@ -731,7 +1113,18 @@ class TelegramNotifier:
 
         self._send_message(chat_id, self.lang.t("invite_generating", exam=exam_key))
 
-        link = self._create_invite_link(group_id, expire_seconds=60, member_limit=1)
+        # One link per group every INVITE_BUCKET_SECONDS instead of a
+        # single-use link per request. It stays valid for at least 30s after
+        # it is handed out; anyone joining without a verified star is still
+        # kicked by _handle_new_chat_members.
+        bucket = int(_time.time()) // INVITE_BUCKET_SECONDS
+        cached = self._invite_cache.get(group_id)
+        if cached and cached[0] == bucket:
+            link = cached[1]
+        else:
+            link = self._create_invite_link(group_id, expire_seconds=60, member_limit=None)
+            if link:
+                self._invite_cache[group_id] = (bucket, link)
         if link:
             self._send_message(chat_id, self.lang.t("invite_link", exam=exam_key, link=link))
             self.logger.info("Invite link sent to {} for {}".format(chat_id, exam_key))
@@ -4,13 +4,55 @@ Fetches the calendar page and parses available seats.
 Supports single exam or ALL exams mode.
 """
 
+import re
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 
 from config.settings import EXAM_TYPES
 
+# Prefer the libxml2-backed parser when lxml is installed; fall back to
+# the stdlib html.parser otherwise
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Only the calendar table is ever read, so the rest of the page is skipped
+# while parsing instead of being built into the tree
+_CALENDAR_ONLY = SoupStrainer("table", id="calendario")
+
+# The calendar is a flat table, so rows and cells can be cut out with
+# regexes instead of building a tree; BeautifulSoup is only the fallback
+# when the table body cannot be located this way
+_CALENDAR_BODY_RE = re.compile(
+    r"<table\b[^>]*\bid\s*=\s*[\"']?calendario\b[^>]*>.*?<tbody\b[^>]*>(.*?)</tbody>",
+    re.S | re.I,
+)
+_ROW_RE = re.compile(r"<tr\b[^>]*>(.*?)</tr>", re.S | re.I)
+_CELL_RE = re.compile(r"<td\b[^>]*>(.*?)(?:</td>|(?=<td\b)|$)", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+_AVAILABLE_SPAN_RE = re.compile(r"<span\b[^>]*\bstyle\s*=[^>]*LimeGreen", re.I)
+
 BASE_URL = "https://testcisia.it/calendario.php"
 
+# Calendar pages fetched at once in ALL mode (also the connection pool size)
+FETCH_WORKERS = 4
+
+REQUEST_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
 
 class CisiaCrawler:
     def __init__(self, exam_type, format_type, language, logger, lang):
@@ -20,42 +62,91 @@ class CisiaCrawler:
         self.logger = logger
         self.lang = lang
 
-    def _build_url(self, exam_key):
-        """Build the CISIA calendar URL for a given exam."""
+        # Every calendar page is on the same host; keep the connection alive
+        self._session = requests.Session()
+        self._session.headers.update(REQUEST_HEADERS)
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS))
+
+        # url -> (ETag, Last-Modified, parsed seats) for conditional GETs
+        self._page_cache = {}
+
+        # Language and format are fixed per crawler, so every exam's URL and
+        # target format can be built up front
+        self._targets = {k: self._build_url_and_format(k) for k in EXAM_TYPES}
+
+    def close(self):
+        """Close the pooled HTTP connections."""
+        self._session.close()
+
+    def _build_url_and_format(self, exam_key):
+        """
+        Return the CISIA calendar URL for an exam and its target format
+        string (e.g. CENT@HOME or TOLC@UNI).
+        """
         info = EXAM_TYPES[exam_key]
+        prefix = info["prefix"]
         url = "{}?tolc={}".format(BASE_URL, info["param"])
-        if info["prefix"] == "CENT":
+        if prefix == "CENT":
             url += "&lingua={}".format(self.language)
         if self.language == "inglese":
             url += "&l=gb"
         else:
             url += "&l=it"
-        return url
-
-    def _get_target_format(self, exam_key):
-        """Return the target format string, e.g. CENT@HOME or TOLC@UNI."""
-        prefix = EXAM_TYPES[exam_key]["prefix"]
-        return "{}{}".format(prefix, self.format_type)
-
-    def _fetch_page(self, url):
-        """Fetch page HTML."""
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        return url, "{}{}".format(prefix, self.format_type)
+
+    def _fetch_page(self, url, etag=None, last_modified=None):
+        """
+        Fetch a page, revalidating against the given validators.
+        Returns None when the server answers 304 Not Modified.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = self._session.get(url, headers=headers, timeout=30)
         self.logger.info(self.lang.t("page_fetched", status=response.status_code))
-        return response.text
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response
 
     def _parse_table(self, html, target_format, exam_key):
-        """Parse the calendar table and return available seats."""
-        soup = BeautifulSoup(html, "html.parser")
+        """
+        Parse the calendar table and return available seats.
+        """
+        body = _CALENDAR_BODY_RE.search(html)
+        if not body:
+            return self._parse_table_soup(html, target_format, exam_key)
+
+        rows = _ROW_RE.findall(body.group(1))
+        self.logger.info(self.lang.t("rows_found", count=len(rows)))
+
+        available = []
+
+        for row in rows:
+            cells = _CELL_RE.findall(row)
+            if len(cells) < 8:
+                continue
+
+            format_text = _cell_text(cells[0])
+            if format_text != target_format:
+                continue
+
+            seats_text = _cell_text(cells[5])
+            has_available_span = _AVAILABLE_SPAN_RE.search(cells[6])
+
+            if has_available_span or _is_seat_count(seats_text):
+                available.append(_seat_record(
+                    exam_key, format_text, _cell_text(cells[1]), _cell_text(cells[2]),
+                    _cell_text(cells[3]), _cell_text(cells[4]), seats_text, _cell_text(cells[7]),
+                ))
+
+        return available
+
+    def _parse_table_soup(self, html, target_format, exam_key):
+        """Tree-based parse of the calendar table (fallback for _parse_table)."""
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=_CALENDAR_ONLY)
         table = soup.find("table", {"id": "calendario"})
 
         if not table:
@@ -77,34 +168,23 @@ class CisiaCrawler:
             if len(cells) < 8:
                 continue
 
+            # Most rows belong to other formats; skip them before reading
+            # the remaining cells
             format_text = cells[0].get_text(strip=True)
-            university = cells[1].get_text(strip=True)
-            region = cells[2].get_text(strip=True)
-            city = cells[3].get_text(strip=True)
-            deadline = cells[4].get_text(strip=True)
-            seats_text = cells[5].get_text(strip=True)
-            state_cell = cells[6]
-            date = cells[7].get_text(strip=True)
-
             if format_text != target_format:
                 continue
 
-            has_available_span = state_cell.find(
+            seats_text = cells[5].get_text(strip=True)
+            has_available_span = cells[6].find(
                 "span", style=lambda s: s and "LimeGreen" in s
             )
-            is_number = seats_text.replace("---", "").strip() != "" and seats_text != "---"
-
-            if has_available_span or is_number:
-                available.append({
-                    "exam": exam_key,
-                    "format": format_text,
-                    "university": university,
-                    "region": region,
-                    "city": city,
-                    "deadline": deadline,
-                    "seats": seats_text,
-                    "date": date,
-                })
+
+            if has_available_span or _is_seat_count(seats_text):
+                available.append(_seat_record(
+                    exam_key, format_text,
+                    *(cells[i].get_text(strip=True) for i in (1, 2, 3, 4)),
+                    seats_text, cells[7].get_text(strip=True),
+                ))
 
         return available
 
@@ -120,24 +200,61 @@ class CisiaCrawler:
 
     def _check_single_exam(self, exam_key):
         """Check a single exam type."""
-        url = self._build_url(exam_key)
-        target = self._get_target_format(exam_key)
+        url, target = self._targets[exam_key]
         self.logger.info(self.lang.t("fetching_exam", exam=exam_key))
         self.logger.info(self.lang.t("fetching_url", url=url))
-        html = self._fetch_page(url)
-        seats = self._parse_table(html, target, exam_key)
-        return {exam_key: seats}
+        etag, last_modified, seats = self._page_cache.get(url, (None, None, None))
+        response = self._fetch_page(url, etag, last_modified)
+        if response is None:
+            # Unchanged since the last crawl: reuse the parsed seats
+            return {exam_key: list(seats)}
+
+        seats = self._parse_table(response.text, target, exam_key)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._page_cache[url] = (etag, last_modified, seats)
+        else:
+            self._page_cache.pop(url, None)
+        return {exam_key: list(seats)}
 
     def _check_all_exams(self):
-        """Check every exam type."""
-        all_results = {}
-        for exam_key in EXAM_TYPES:
-            try:
-                result = self._check_single_exam(exam_key)
-                all_results.update(result)
-            except Exception as e:
-                self.logger.error(
-                    self.lang.t("error_check", error="{}: {}".format(exam_key, str(e)))
-                )
-                all_results[exam_key] = []
-        return all_results
+        """Check every exam type, fetching several pages at once."""
+        # Results keep EXAM_TYPES order regardless of which page lands first
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(EXAM_TYPES))) as pool:
+            results = pool.map(self._check_exam_safe, EXAM_TYPES)
+            return dict(zip(EXAM_TYPES, results))
+
+    def _check_exam_safe(self, exam_key):
+        """Return the seats for one exam, or [] after logging any error."""
+        try:
+            return self._check_single_exam(exam_key)[exam_key]
+        except Exception as e:
+            self.logger.error(
+                self.lang.t("error_check", error="{}: {}".format(exam_key, str(e)))
+            )
+            return []
+
+
+def _cell_text(cell):
+    """Text of a raw <td> body, matching BeautifulSoup's get_text(strip=True)."""
+    return "".join(unescape(part).strip() for part in _TAG_RE.split(cell))
+
+
+def _is_seat_count(seats_text):
+    """True when the seats cell shows something other than the '---' placeholder."""
+    return seats_text.replace("---", "").strip() != "" and seats_text != "---"
+
+
+def _seat_record(exam_key, format_text, university, region, city, deadline, seats_text, date):
+    """Build one seat dict; the seat count is an int when the cell shows one."""
+    return {
+        "exam": exam_key,
+        "format": format_text,
+        "university": university,
+        "region": region,
+        "city": city,
+        "deadline": deadline,
+        "seats": int(seats_text) if seats_text.isdigit() else seats_text,
+        "date": date,
+    }
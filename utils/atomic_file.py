@@ -0,0 +1,53 @@
+"""
+Atomic file replacement.
+Writes go to a temporary file next to the target and are renamed over it,
+so a crash mid-write never leaves a truncated JSON file behind.
+"""
+
+import errno
+import os
+import threading
+
+
+def atomic_write(path, data):
+    """
+    Replace `path` with `data` (str or UTF-8 bytes) in one rename.
+    Returns the os.stat_result of the written file, taken before the rename
+    so that a later writer cannot be mistaken for this one.
+
+    When the target cannot be renamed over (a file bind-mounted on its own
+    into a Docker container gives EBUSY, another filesystem gives EXDEV),
+    it is rewritten in place instead, without the atomicity guarantee.
+    """
+    if not isinstance(data, bytes):
+        data = data.encode("utf-8")
+    tmp = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            st = os.fstat(f.fileno())
+        try:
+            os.replace(tmp, path)
+            return st
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+        os.remove(tmp)
+        return _write_in_place(path, data)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _write_in_place(path, data):
+    """Truncate and rewrite `path`; returns its os.stat_result."""
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        return os.fstat(f.fileno())
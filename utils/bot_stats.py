@@ -4,24 +4,50 @@ Records crawl events, errors, and bot running state.
 Persists to bot_stats.json.
 """
 
-import json
+import atexit
 import os
 import threading
 import time
+from collections import Counter, deque
 from datetime import datetime
 
+from utils.atomic_file import atomic_write
+from utils.jsonio import dumps, loads
+from utils.sleeper import Sleeper
+
 STATS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "bot_stats.json")
 
+# How often wait_for_stop() re-reads the on-disk flag so that a stop
+# requested from another process (e.g. the web panel) is still noticed.
+STOP_POLL_SECONDS = 5
+
+# Crawl and error records arriving within this window are written together
+SAVE_DELAY_SECONDS = 1.0
+
+# Days of daily crawl/error counts kept on disk (the web panel charts 30)
+DAILY_HISTORY_DAYS = 90
+
+# Most recent crawl and error records kept in the history lists
+CRAWL_HISTORY_SIZE = 200
+ERROR_HISTORY_SIZE = 100
+
 
 class BotStats:
     """Thread-safe bot statistics storage.
     
-    Reads fresh from disk on every get operation so that separate
-    processes (web panel, bot_runner, main.py) always see each other's writes.
+    Re-checks the file on every get operation so that separate processes
+    (web panel, bot_runner, main.py) always see each other's writes; the
+    JSON is only re-parsed when the file has actually changed.
     """
 
     def __init__(self):
         self._lock = threading.Lock()
+        self._write_lock = threading.Lock()   # keeps saves in order
+        self._saving = False        # our own write is replacing the file
+        self._stop_event = threading.Event()
+        self._file_stamp = None     # (mtime_ns, size) of the last read/write
+        self._pending = []          # record updates not yet written to disk
+        self._flush_timer = None
         self._data = {
             "bot_running": False,
             "bot_pid": None,
@@ -32,100 +58,195 @@ class BotStats:
             "last_error_at": None,
             "last_error_msg": "",
             "started_at": None,
-            "crawl_history": [],    # [{time, seats_found, exams_checked}] last 200
-            "error_history": [],    # [{time, message}] last 100
-            "daily_crawls": {},     # {"2026-02-09": 15, ...}
-            "daily_errors": {},     # {"2026-02-09": 2, ...}
+            "crawl_history": deque(maxlen=CRAWL_HISTORY_SIZE),  # [{time, seats_found, exams_checked}]
+            "error_history": deque(maxlen=ERROR_HISTORY_SIZE),  # [{time, message}]
+            "daily_crawls": Counter(),  # {"2026-02-09": 15, ...}
+            "daily_errors": Counter(),  # {"2026-02-09": 2, ...}
         }
         self._load()
+        atexit.register(self.flush)
 
     def _load(self):
         """Load stats from disk, merging with defaults."""
-        if os.path.exists(STATS_FILE):
-            try:
-                with open(STATS_FILE, "r", encoding="utf-8") as f:
-                    saved = json.load(f)
-                self._data.update(saved)
-            except Exception:
-                pass
+        self._reload()
 
     def _reload(self):
-        """Re-read from disk to pick up writes from other processes."""
-        if os.path.exists(STATS_FILE):
-            try:
-                with open(STATS_FILE, "r", encoding="utf-8") as f:
-                    saved = json.load(f)
-                self._data.update(saved)
-            except Exception:
-                pass
+        """Re-read from disk to pick up writes from other processes.
+
+        Skipped when the file's mtime and size match the last read or
+        write, so the frequent is_running() checks rarely touch JSON.
+        """
+        if self._saving:
+            return      # the file is being replaced with our newer data
+        try:
+            with open(STATS_FILE, "rb") as f:
+                st = os.fstat(f.fileno())
+                stamp = (st.st_mtime_ns, st.st_size)
+                if stamp == self._file_stamp:
+                    return
+                saved = loads(f.read())
+            self._data.update(saved)
+            self._data["crawl_history"] = deque(self._data["crawl_history"], maxlen=CRAWL_HISTORY_SIZE)
+            self._data["error_history"] = deque(self._data["error_history"], maxlen=ERROR_HISTORY_SIZE)
+            self._data["daily_crawls"] = Counter(self._data["daily_crawls"])
+            self._data["daily_errors"] = Counter(self._data["daily_errors"])
+            self._file_stamp = stamp
+            # Another process wrote in the meantime; redo our unsaved records on top
+            for apply in self._pending:
+                apply()
+        except Exception:
+            pass
 
     def _save(self):
-        with open(STATS_FILE, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, indent=2, ensure_ascii=False)
+        """Write the stats; encoding and disk I/O happen outside _lock."""
+        with self._write_lock:
+            with self._lock:
+                self._reload()
+                data = self._snapshot()
+                saved = len(self._pending)
+                self._saving = True
+            stamp = None
+            try:
+                st = atomic_write(STATS_FILE, dumps(data))
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass    # unwritten records stay pending for the next save
+            finally:
+                with self._lock:
+                    self._saving = False
+                    if stamp:
+                        self._file_stamp = stamp
+                        # Records made while writing stay pending
+                        del self._pending[:saved]
 
-    def set_running(self, running, pid=None):
+    def _record(self, apply):
+        """Apply an update now and schedule it to be written (caller holds _lock)."""
+        self._reload()
+        apply()
+        self._pending.append(apply)
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(SAVE_DELAY_SECONDS, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write any records still waiting for the debounce window."""
         with self._lock:
-            self._reload()
+            self._flush_timer = None
+            if not self._pending:
+                return
+        self._save()
+
+    def set_running(self, running, pid=None):
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if running else None
+
+        def apply():
             self._data["bot_running"] = running
             self._data["bot_pid"] = pid
             if running:
-                self._data["started_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self._save()
+                self._data["started_at"] = started_at
+
+        with self._lock:
+            self._reload()
+            apply()
+            # Queued like a record so a concurrent reload cannot drop it
+            self._pending.append(apply)
+            if running:
+                self._stop_event.clear()
+            else:
+                self._stop_event.set()
+        # Written right away rather than after the debounce window
+        self._save()
 
     def is_running(self):
         with self._lock:
             self._reload()
             return self._data.get("bot_running", False)
 
+    def wait_for_stop(self, timeout):
+        """Block up to `timeout` seconds or until the bot is stopped.
+
+        Returns True if a stop was requested, False if the timeout elapsed.
+        In-process stops wake the waiter immediately; stops written by
+        another process are picked up every STOP_POLL_SECONDS.
+        """
+        sleeper = Sleeper(time.monotonic() + max(0, timeout), self._stop_event)
+        while True:
+            if sleeper.sleep(max_wait=STOP_POLL_SECONDS):
+                return True
+            if sleeper.remaining() <= 0:
+                return False
+            if not self.is_running():
+                self._stop_event.set()
+                return True
+
     def record_crawl(self, seats_found=0, exams_checked=0):
-        now = datetime.now()
-        day = now.strftime("%Y-%m-%d")
-        ts = now.strftime("%Y-%m-%d %H:%M:%S")
-        with self._lock:
-            self._reload()
+        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        day = ts[:10]
+
+        def apply():
             self._data["total_crawls"] += 1
             self._data["total_seats_found"] += seats_found
             self._data["last_crawl_at"] = ts
+            # Bounded deque: the oldest record drops off on its own
             self._data["crawl_history"].append({
                 "time": ts, "seats_found": seats_found, "exams_checked": exams_checked,
             })
-            # Keep last 200
-            self._data["crawl_history"] = self._data["crawl_history"][-200:]
             # Daily
-            self._data["daily_crawls"][day] = self._data["daily_crawls"].get(day, 0) + 1
-            self._save()
+            _count_day(self._data["daily_crawls"], day)
 
-    def record_error(self, message):
-        now = datetime.now()
-        day = now.strftime("%Y-%m-%d")
-        ts = now.strftime("%Y-%m-%d %H:%M:%S")
         with self._lock:
-            self._reload()
+            self._record(apply)
+
+    def record_error(self, message):
+        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        day = ts[:10]
+
+        def apply():
             self._data["total_errors"] += 1
             self._data["last_error_at"] = ts
             self._data["last_error_msg"] = str(message)[:500]
             self._data["error_history"].append({"time": ts, "message": str(message)[:200]})
-            self._data["error_history"] = self._data["error_history"][-100:]
-            self._data["daily_errors"][day] = self._data["daily_errors"].get(day, 0) + 1
-            self._save()
+            _count_day(self._data["daily_errors"], day)
+
+        with self._lock:
+            self._record(apply)
 
     def get_stats(self):
         with self._lock:
             self._reload()
-            return dict(self._data)
+            return self._snapshot()
+
+    def _snapshot(self):
+        """Copy of the stats as plain lists and dicts (caller holds _lock)."""
+        data = dict(self._data)
+        data["crawl_history"] = list(data["crawl_history"])
+        data["error_history"] = list(data["error_history"])
+        data["daily_crawls"] = dict(data["daily_crawls"])
+        data["daily_errors"] = dict(data["daily_errors"])
+        return data
 
     def get_daily_data(self, days=14):
         """Return last N days of crawl/error counts for charts."""
+        # Step back whole days from today's local noon; DST shifts of an
+        # hour either way still land on the right date
+        now = time.localtime()
+        noon = time.mktime((now.tm_year, now.tm_mon, now.tm_mday, 12, 0, 0, 0, 0, -1))
+        dates = [
+            time.strftime("%Y-%m-%d", time.localtime(noon - i * 86400))
+            for i in range(days - 1, -1, -1)
+        ]
         with self._lock:
             self._reload()
-            from datetime import timedelta
-            today = datetime.now().date()
-            result = []
-            for i in range(days - 1, -1, -1):
-                d = (today - timedelta(days=i)).strftime("%Y-%m-%d")
-                result.append({
-                    "date": d,
-                    "crawls": self._data["daily_crawls"].get(d, 0),
-                    "errors": self._data["daily_errors"].get(d, 0),
-                })
-            return result
+            crawls = self._data["daily_crawls"]
+            errors = self._data["daily_errors"]
+            return [{"date": d, "crawls": crawls[d], "errors": errors[d]} for d in dates]
+
+
+def _count_day(counts, day):
+    """Bump a daily Counter, dropping days older than DAILY_HISTORY_DAYS."""
+    if day not in counts and len(counts) >= DAILY_HISTORY_DAYS:
+        # Keys are ISO dates, so string order is date order
+        for old in sorted(counts)[:len(counts) - DAILY_HISTORY_DAYS + 1]:
+            del counts[old]
+    counts[day] += 1
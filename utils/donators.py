@@ -3,14 +3,20 @@ Donator persistence module.
 Tracks users who claim to have donated via USDT TRC20 and stores their transaction details.
 """
 
-import json
 import os
 import threading
 from datetime import datetime
 
+from utils.atomic_file import atomic_write
+from utils.jsonio import dumps, loads
+
 DONATORS_FILE = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "donators.json"
 )
+# Changes since the last snapshot, one JSON operation per line
+DONATORS_LOG = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "donators.log"
+)
 
 USDT_TRC20_ADDRESS = "TJaPMJJekVuBbQKbtp8w69m7GrojSaiRRm"
 
@@ -35,21 +41,75 @@ class DonatorManager:
     def __init__(self):
         self._lock = threading.Lock()
         self._data = {}  # chat_id (str) -> record
+        # chat_ids split by verification, as insertion-ordered dicts used as sets
+        self._verified = {}
+        self._unverified = {}
+        self._log_ops = 0  # lines in DONATORS_LOG
         self._load()
 
     def _load(self):
         if os.path.exists(DONATORS_FILE):
             try:
-                with open(DONATORS_FILE, "r", encoding="utf-8") as f:
-                    records = json.load(f)
+                with open(DONATORS_FILE, "rb") as f:
+                    records = loads(f.read())
                 for rec in records:
                     self._data[str(rec["chat_id"])] = rec
-            except (json.JSONDecodeError, KeyError):
+            except (ValueError, KeyError):
                 self._data = {}
+        if os.path.exists(DONATORS_LOG):
+            torn = False
+            with open(DONATORS_LOG, "rb") as f:
+                for line in f:
+                    self._log_ops += 1
+                    try:
+                        self._apply(loads(line))
+                    except (ValueError, KeyError):
+                        torn = True     # partial last line after a crash
+            if torn:
+                # Start a clean log so new lines are not glued onto the bad one
+                self._save()
+        for chat_id in self._data:
+            self._reindex(chat_id)
+
+    def _reindex(self, chat_id):
+        """File chat_id under verified/unverified to match its record."""
+        rec = self._data.get(chat_id)
+        if rec is None:
+            self._verified.pop(chat_id, None)
+            self._unverified.pop(chat_id, None)
+            return
+        into, out = (
+            (self._verified, self._unverified) if rec.get("verified")
+            else (self._unverified, self._verified)
+        )
+        out.pop(chat_id, None)
+        # Left in place when unchanged, so listing order stays stable
+        into.setdefault(chat_id, None)
+
+    def _apply(self, entry):
+        """Replay one logged operation onto the in-memory records."""
+        op, chat_id = entry["op"], entry["chat_id"]
+        if op == "add":
+            self._data[chat_id] = entry["rec"]
+        elif op == "verify":
+            if chat_id in self._data:
+                self._data[chat_id]["verified"] = entry["verified"]
+        elif op == "remove":
+            self._data.pop(chat_id, None)
+
+    def _log(self, entry):
+        """Append one operation; compact once the log outgrows the snapshot."""
+        with open(DONATORS_LOG, "ab") as f:
+            f.write(dumps(entry) + b"\n")
+        self._log_ops += 1
+        if self._log_ops > 2 * len(self._data) + 10:
+            self._save()
 
     def _save(self):
-        with open(DONATORS_FILE, "w", encoding="utf-8") as f:
-            json.dump(list(self._data.values()), f, indent=2, ensure_ascii=False)
+        """Write a full snapshot and start a new, empty log."""
+        atomic_write(DONATORS_FILE, dumps(list(self._data.values()), indent=True))
+        open(DONATORS_LOG, "w").close()
+        self._log_ops = 0
 
     def add_donation(self, chat_id, transaction_id, user_info=None):
         """Record a donation claim with transaction ID."""
@@ -66,7 +126,8 @@ class DonatorManager:
                 "donated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "verified": False,
             }
-            self._save()
+            self._reindex(chat_id)
+            self._log({"op": "add", "chat_id": chat_id, "rec": self._data[chat_id]})
 
     def is_donator(self, chat_id):
         """Check if a user has submitted a donation."""
@@ -91,7 +152,8 @@ class DonatorManager:
         with self._lock:
             if chat_id in self._data:
                 self._data[chat_id]["verified"] = verified
-                self._save()
+                self._reindex(chat_id)
+                self._log({"op": "verify", "chat_id": chat_id, "verified": verified})
                 return True
             return False
 
@@ -101,19 +163,20 @@ class DonatorManager:
         with self._lock:
             if chat_id in self._data:
                 del self._data[chat_id]
-                self._save()
+                self._reindex(chat_id)
+                self._log({"op": "remove", "chat_id": chat_id})
                 return True
             return False
 
     def get_unverified_donators(self):
         """Return list of donators whose transactions have not been verified yet."""
         with self._lock:
-            return [r for r in self._data.values() if not r.get("verified")]
+            return [self._data[i] for i in self._unverified]
 
     def get_verified_donators(self):
         """Return list of donators whose transactions have been verified."""
         with self._lock:
-            return [r for r in self._data.values() if r.get("verified")]
+            return [self._data[i] for i in self._verified]
 
     def is_verified_donator(self, chat_id):
         """Check if a user is a verified (premium) donator."""
@@ -7,6 +7,12 @@ Caches the stargazers list to avoid hitting API rate limits.
 import requests
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from requests.adapters import HTTPAdapter
+
+from utils.jsonio import loads
 
 GITHUB_REPO_OWNER = "blackat5445"
 GITHUB_REPO_NAME = "cisia-crawler"
@@ -15,6 +21,15 @@ GITHUB_REPO_URL = "https://github.com/{}/{}".format(GITHUB_REPO_OWNER, GITHUB_RE
 # Cache duration in seconds (5 minutes)
 CACHE_TTL = 300
 
+# How long a per-username answer is reused, and how stale the stargazer
+# list may be before a "not starred" answer triggers a refetch
+POSITIVE_TTL = 3600
+NEGATIVE_TTL = 60
+
+PER_PAGE = 100
+# Stargazer pages fetched at once (also the connection pool size)
+FETCH_WORKERS = 8
+
 
 class GitHubStarChecker:
     """Check if a GitHub user has starred the repository."""
@@ -25,69 +40,143 @@ class GitHubStarChecker:
         self._lock = threading.Lock()
         self._stargazers = set()
         self._last_fetch = 0
+        self._last_page = 1         # last stargazer page read by the previous fetch
+        self._last_tail_fetch = 0
         self._github_token = github_token
+        self._results = {}      # lowercase username -> (starred, checked_at)
 
-    def _fetch_stargazers(self):
-        """Fetch all stargazers from GitHub API (paginated)."""
-        now = time.time()
-        if now - self._last_fetch < CACHE_TTL and self._stargazers:
-            return
-
-        headers = {
+        # One keep-alive session shared by the page fetches
+        self._url = self.API_URL.format(owner=GITHUB_REPO_OWNER, repo=GITHUB_REPO_NAME)
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS))
+        self._session.headers.update({
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
-        }
-        if self._github_token:
-            headers["Authorization"] = "Bearer {}".format(self._github_token)
-
-        all_stargazers = set()
-        page = 1
-        per_page = 100
-
-        while True:
-            url = self.API_URL.format(owner=GITHUB_REPO_OWNER, repo=GITHUB_REPO_NAME)
+        })
+        if github_token:
+            self._session.headers["Authorization"] = "Bearer {}".format(github_token)
+
+    def _get_page(self, page):
+        """Return (stargazers on `page`, last page number), or None on failure."""
+        try:
+            resp = self._session.get(
+                self._url, params={"per_page": PER_PAGE, "page": page}, timeout=15,
+            )
+            if resp.status_code != 200:
+                return None
+            data = loads(resp.content)
+        except Exception:
+            return None
+        # GitHub names the last page in the Link header (absent on the last page)
+        last = resp.links.get("last", {}).get("url")
+        if last:
             try:
-                resp = requests.get(
-                    url,
-                    headers=headers,
-                    params={"per_page": per_page, "page": page},
-                    timeout=15,
-                )
-                if resp.status_code != 200:
-                    break
-
-                data = resp.json()
-                if not data:
-                    break
-
-                for user in data:
-                    login = user.get("login", "").lower()
-                    if login:
-                        all_stargazers.add(login)
-
-                if len(data) < per_page:
-                    break
-                page += 1
-
-            except Exception:
+                return data, int(parse_qs(urlparse(last).query)["page"][0])
+            except (KeyError, ValueError):
+                pass
+        return data, page
+
+    def _fetch_pages(self, page):
+        """
+        Read stargazer pages from `page` to the end.
+        Returns (lowercased logins, number of the last page read).
+        """
+        logins = set()
+        result = self._get_page(page)
+        if result is None:
+            return logins, page
+        data, last = result
+        _add_logins(logins, data)
+
+        if last > page:
+            # The remaining page count is known, so fetch them together
+            pages = range(page + 1, last + 1)
+            with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(pages))) as pool:
+                results = list(pool.map(self._get_page, pages))
+            for result in results:
+                if result:
+                    _add_logins(logins, result[0])
+            page = last
+            data = results[-1][0] if results[-1] else []
+
+        # Stars added while paging can spill past a full last page
+        while len(data) == PER_PAGE:
+            page += 1
+            result = self._get_page(page)
+            if not result or not result[0]:
                 break
+            data = result[0]
+            _add_logins(logins, data)
+
+        return logins, page
+
+    def _fetch_stargazers(self, max_age=CACHE_TTL):
+        """Fetch all stargazers from GitHub API (paginated)."""
+        now = time.time()
+        if now - self._last_fetch < max_age and self._stargazers:
+            return
+
+        all_stargazers, last_page = self._fetch_pages(1)
 
         with self._lock:
             self._stargazers = all_stargazers
             self._last_fetch = now
+            self._last_page = last_page
+            self._last_tail_fetch = now
+
+    def _fetch_new_stargazers(self, max_age=NEGATIVE_TTL):
+        """
+        Pick up recent stars without a full refetch. Stargazers are listed
+        oldest first, so new ones are on the last page read or after it.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._last_tail_fetch < max_age:
+                return
+            self._last_tail_fetch = now
+            start = self._last_page
+
+        new_stargazers, last_page = self._fetch_pages(start)
+
+        with self._lock:
+            self._stargazers |= new_stargazers
+            self._last_page = last_page
 
     def has_starred(self, github_username):
         """Check if a GitHub username has starred the repo."""
         if not github_username:
             return False
 
+        key = github_username.lower().strip().lstrip("@")
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(key)
+        if cached and now - cached[1] < (POSITIVE_TTL if cached[0] else NEGATIVE_TTL):
+            return cached[0]
+
         self._fetch_stargazers()
+        with self._lock:
+            starred = key in self._stargazers
+        if not starred:
+            # The user may have just starred; don't wait out the full CACHE_TTL
+            self._fetch_new_stargazers()
+            with self._lock:
+                starred = key in self._stargazers
 
         with self._lock:
-            return github_username.lower().strip().lstrip("@") in self._stargazers
+            self._results[key] = (starred, now)
+        return starred
 
     def get_stargazer_count(self):
         """Return the number of cached stargazers."""
         self._fetch_stargazers()
         with self._lock:
             return len(self._stargazers)
+
+
+def _add_logins(logins, data):
+    """Add the lowercased logins from one stargazers page to `logins`."""
+    for user in data:
+        login = user.get("login", "").lower()
+        if login:
+            logins.add(login)
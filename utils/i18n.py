@@ -149,7 +149,7 @@ TRANSLATIONS = {
         "invite_link": (
             "\U0001F517 <b>{exam}</b> \u2013 Group Invite Link\n\n"
             "{link}\n\n"
-            "\u26A0\uFE0F This link expires in <b>1 minute</b> and can only be used once."
+            "\u26A0\uFE0F This link expires within <b>1 minute</b>."
         ),
 
         # Interval
@@ -321,7 +321,7 @@ TRANSLATIONS = {
         "invite_link": (
             "\U0001F517 <b>{exam}</b> \u2013 Link Invito Gruppo\n\n"
             "{link}\n\n"
-            "\u26A0\uFE0F Questo link scade in <b>1 minuto</b> e puo' essere usato una sola volta."
+            "\u26A0\uFE0F Questo link scade entro <b>1 minuto</b>."
         ),
 
         "interval_info": (
@@ -359,6 +359,10 @@ class I18n:
         self.language = language
         self.strings = TRANSLATIONS.get(language, TRANSLATIONS["en"])
 
+    def t_template(self, key):
+        """Get the raw, unformatted template string for a key."""
+        return self.strings.get(key, key)
+
     def t(self, key, **kwargs):
         """Get translated string with optional formatting."""
         text = self.strings.get(key, key)
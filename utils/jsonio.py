@@ -0,0 +1,25 @@
+"""
+JSON encoding helpers.
+Uses orjson when it is installed and the standard json module otherwise;
+dumps() returns UTF-8 bytes either way.
+"""
+
+try:
+    import orjson
+
+    loads = orjson.loads
+
+    def dumps(obj, indent=False):
+        """Encode `obj`, pretty-printed with two spaces when `indent` is set."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+except ImportError:
+    import json
+
+    loads = json.loads
+
+    def dumps(obj, indent=False):
+        """Encode `obj`, pretty-printed with two spaces when `indent` is set."""
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -405,6 +405,7 @@ def test_telegram(settings):
     )
 
     success = notifier.test_connection()
+    notifier.shutdown()
 
     if success:
         print("\n  [OK] Test message sent. Check your Telegram.")
@@ -467,6 +468,7 @@ def test_email(settings):
     )
 
     success = notifier.send_test()
+    notifier.close()
 
     if success:
         print("\n  [OK] Test email sent to {}".format(em["to_email"]))
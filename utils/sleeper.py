@@ -0,0 +1,31 @@
+"""
+Deadline-based sleeper.
+Waits until a fixed monotonic deadline or until a stop event is set.
+"""
+
+import time
+
+
+class Sleeper:
+    """
+    Sleep until `deadline` (a time.monotonic() value) in as few wakeups
+    as possible, returning early as soon as `stop_event` is set.
+    """
+
+    def __init__(self, deadline, stop_event):
+        self.deadline = deadline
+        self.stop_event = stop_event
+
+    def remaining(self):
+        """Seconds left until the deadline (never negative)."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def sleep(self, max_wait=None):
+        """
+        Block until the deadline, the stop event, or `max_wait` seconds,
+        whichever comes first. Returns True if the stop event is set.
+        """
+        timeout = self.remaining()
+        if max_wait is not None:
+            timeout = min(timeout, max_wait)
+        return self.stop_event.wait(timeout)
@@ -4,11 +4,13 @@ Stores subscribers, their exam preferences, profile info,
 GitHub verification status, and preferred check interval.
 """
 
-import json
 import os
 import threading
 from datetime import datetime
 
+from utils.atomic_file import atomic_write
+from utils.jsonio import dumps, loads
+
 SUBSCRIBERS_FILE = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "subscribers.json"
 )
@@ -37,21 +39,29 @@ class SubscriberManager:
     def __init__(self):
         self._lock = threading.Lock()
         self._data = {}  # chat_id (str) -> record
+        self._by_user_id = {}  # user_id (int) -> record
         self._load()
 
+    def _index(self, rec):
+        try:
+            self._by_user_id[int(rec.get("user_id"))] = rec
+        except (TypeError, ValueError):
+            pass
+
     def _load(self):
         if os.path.exists(SUBSCRIBERS_FILE):
             try:
-                with open(SUBSCRIBERS_FILE, "r", encoding="utf-8") as f:
-                    records = json.load(f)
+                with open(SUBSCRIBERS_FILE, "rb") as f:
+                    records = loads(f.read())
                 for rec in records:
                     self._data[str(rec["chat_id"])] = rec
-            except (json.JSONDecodeError, KeyError):
+                    self._index(rec)
+            except (ValueError, KeyError):
                 self._data = {}
+                self._by_user_id = {}
 
     def _save(self):
-        with open(SUBSCRIBERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(list(self._data.values()), f, indent=2, ensure_ascii=False)
+        atomic_write(SUBSCRIBERS_FILE, dumps(list(self._data.values()), indent=True))
 
     def subscribe(self, chat_id, user_info=None):
         """
@@ -79,6 +89,7 @@ class SubscriberManager:
                 "github_username": existing.get("github_username", ""),
                 "preferred_interval_minutes": existing.get("preferred_interval_minutes", 5),
             }
+            self._index(self._data[chat_id])
             self._save()
             return is_new
 
@@ -138,6 +149,16 @@ class SubscriberManager:
         chat_id = str(chat_id)
         return self._data.get(chat_id)
 
+    def get_by_user_id(self, user_id):
+        """Return the subscriber record for a Telegram user_id, or None."""
+        rec = self._by_user_id.get(user_id)
+        if rec is None and not isinstance(user_id, int):
+            try:
+                rec = self._by_user_id.get(int(user_id))
+            except (TypeError, ValueError):
+                pass
+        return rec
+
     def get_active_subscribers(self):
         """Return list of active subscriber records."""
         with self._lock: